@@ -2,6 +2,23 @@
 from compass import Compass
 import stdio
 
+try:
+    import numpy as np
+except ImportError:  # only BeePopulation needs numpy
+    np = None
+
+# Compass direction in degrees -> (row step, col step)
+DIRECTION_STEPS = {
+    0: (0, 1),      # Right
+    45: (1, 1),     # Up-Right
+    90: (1, 0),     # Up
+    135: (1, -1),   # Up-Left
+    180: (0, -1),   # Left
+    225: (-1, -1),  # Down-Left
+    270: (-1, 0),   # Down
+    315: (-1, 1),   # Down-Right
+}
+
 class Bee:
     def __init__(self, row, col, speed, perception):
         self.row = row
@@ -16,28 +33,10 @@ class Bee:
         direction = trajectory.get_direction_in_degrees()
         distance = trajectory.get_distance()
 
-        # Calculate new position
-        new_row, new_col = self.row, self.col
-        if direction == 0:  # Right
-            new_col += distance
-        elif direction == 90:  # Up
-            new_row += distance
-        elif direction == 180:  # Left
-            new_col -= distance
-        elif direction == 270:  # Down
-            new_row -= distance
-        elif direction == 45:  # Up-Right
-            new_row += distance
-            new_col += distance
-        elif direction == 135:  # Up-Left
-            new_row += distance
-            new_col -= distance
-        elif direction == 225:  # Down-Left
-            new_row -= distance
-            new_col -= distance
-        elif direction == 315:  # Down-Right
-            new_row -= distance
-            new_col += distance
+        # Calculate new position; unknown directions leave the bee in place
+        row_step, col_step = DIRECTION_STEPS.get(direction, (0, 0))
+        new_row = self.row + row_step * distance
+        new_col = self.col + col_step * distance
 
         # Bound the movement by the size of the map
         self.row = max(0, min(new_row, map_size - 1))
@@ -51,3 +50,109 @@ class Bee:
     def drop_pollen(self):
         if self.carrying_pollen:
             self.carrying_pollen = False
+
+
+class _PopulationField:
+    """Exposes one array of a BeePopulation as an attribute of a PopulationBee."""
+
+    def __init__(self, convert):
+        self.convert = convert
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, bee, owner=None):
+        if bee is None:
+            return self
+        return self.convert(getattr(bee.population, self.name)[bee.index])
+
+    def __set__(self, bee, value):
+        getattr(bee.population, self.name)[bee.index] = value
+
+
+class PopulationBee(Bee):
+    """A Bee whose state lives in row index of a BeePopulation. It can be used
+    anywhere a Bee can; moving it on its own moves that row of the population."""
+
+    row = _PopulationField(int)
+    col = _PopulationField(int)
+    speed = _PopulationField(int)
+    perception = _PopulationField(int)
+    carrying_pollen = _PopulationField(bool)
+
+    def __init__(self, population, index):
+        self.population = population
+        self.index = index
+
+    @property
+    def compass(self):
+        return self.population.compasses[self.index]
+
+
+class BeePopulation:
+    """Bees stored as a structure of arrays (row, col, speed, perception and
+    carrying_pollen), so that a whole population moves in one vectorized step.
+    Requires numpy."""
+
+    def __init__(self, capacity=16):
+        self.count = 0
+        self.row = np.zeros(capacity, dtype=np.int64)
+        self.col = np.zeros(capacity, dtype=np.int64)
+        self.speed = np.zeros(capacity, dtype=np.int64)
+        self.perception = np.zeros(capacity, dtype=np.int64)
+        self.carrying_pollen = np.zeros(capacity, dtype=bool)
+        self.compasses = []
+        self.bees = []
+
+    def add(self, row, col, speed, perception):
+        """Adds a bee and returns the PopulationBee viewing it."""
+        if self.count == len(self.row):
+            capacity = max(2 * self.count, 16)
+            for name in ("row", "col", "speed", "perception", "carrying_pollen"):
+                array = getattr(self, name)
+                grown = np.zeros(capacity, dtype=array.dtype)
+                grown[:self.count] = array[:self.count]
+                setattr(self, name, grown)
+        index = self.count
+        self.row[index] = row
+        self.col[index] = col
+        self.speed[index] = speed
+        self.perception[index] = perception
+        self.carrying_pollen[index] = False
+        self.compasses.append(Compass(row, col, speed))
+        self.count += 1
+        bee = PopulationBee(self, index)
+        self.bees.append(bee)
+        return bee
+
+    def next_trajectories(self):
+        """Returns the next (directions, distances) arrays from the bees' compasses."""
+        directions = np.empty(self.count, dtype=np.int64)
+        distances = np.empty(self.count, dtype=np.int64)
+        for i, compass in enumerate(self.compasses):
+            trajectory = compass.get_next_trajectory()
+            directions[i] = trajectory.get_direction_in_degrees()
+            distances[i] = trajectory.get_distance()
+        return directions, distances
+
+    def move(self, map_size, directions=None, distances=None):
+        """Moves every bee like Bee.move(), taking the trajectories from the
+        compasses unless directions and distances (in degrees) are given."""
+        if directions is None:
+            directions, distances = self.next_trajectories()
+        n = self.count
+        # Unknown directions leave the bee in place, as in Bee.move()
+        directions = np.where((directions >= 0) & (directions < 360), directions, 1)
+        row_steps = ROW_STEPS[directions]
+        col_steps = COL_STEPS[directions]
+        np.clip(self.row[:n] + row_steps * distances, 0, map_size - 1, out=self.row[:n])
+        np.clip(self.col[:n] + col_steps * distances, 0, map_size - 1, out=self.col[:n])
+
+
+if np is not None:
+    # DIRECTION_STEPS as lookup tables indexed by degrees
+    ROW_STEPS = np.zeros(360, dtype=np.int64)
+    COL_STEPS = np.zeros(360, dtype=np.int64)
+    for _degrees, (_row_step, _col_step) in DIRECTION_STEPS.items():
+        ROW_STEPS[_degrees] = _row_step
+        COL_STEPS[_degrees] = _col_step
@@ -0,0 +1,79 @@
+"""
+Throughput benchmark for dnasearch.py
+
+Compares checking candidate genes with one `python dnasearch.py <dna>`
+process per candidate against the batch mode (`--batch`), in a single
+process and across a process pool.
+
+Example: python3 bench_dnasearch.py --candidates 200000 --workers 4
+"""
+
+import argparse
+import io
+import os
+import random
+import subprocess
+import sys
+import time
+
+import dnasearch
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_candidates(count, seed=0):
+    """Returns count random candidates, about half of them shaped like genes."""
+    rng = random.Random(seed)
+    candidates = []
+    for _ in range(count):
+        body = "".join(rng.choice("ACGT") for _ in range(3 * rng.randint(5, 60)))
+        if rng.random() < 0.5:
+            body = dnasearch.START_CODON + body + rng.choice(dnasearch.STOP_CODONS)
+        candidates.append(body)
+    return candidates
+
+
+def time_per_process(candidates):
+    """Seconds taken to check each candidate in its own interpreter."""
+    script = os.path.join(HERE, "dnasearch.py")
+    start = time.perf_counter()
+    for dna in candidates:
+        subprocess.run([sys.executable, script, dna], check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def time_batch(candidates, workers):
+    """Seconds taken by the batch mode to check all candidates."""
+    stream = io.StringIO("\n".join(candidates) + "\n")
+    start = time.perf_counter()
+    dnasearch.run_batch(stream, io.StringIO(), workers)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dnasearch.py batch mode")
+    parser.add_argument("--candidates", type=int, default=100000,
+                        help="Candidates checked in batch mode (default: 100000)")
+    parser.add_argument("--processes", type=int, default=50,
+                        help="Candidates checked one process each (default: 50)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for the parallel batch run (default: all cores)")
+    args = parser.parse_args()
+
+    candidates = make_candidates(args.candidates)
+    rows = [("one process per candidate", args.processes,
+             time_per_process(candidates[:args.processes]))]
+    rows.append(("batch, 1 process", len(candidates), time_batch(candidates, 1)))
+    if args.workers > 1:
+        rows.append((f"batch, {args.workers} workers", len(candidates),
+                     time_batch(candidates, args.workers)))
+
+    baseline = rows[0][1] / rows[0][2]
+    print(f"{'mode':<28}{'candidates':>12}{'seconds':>10}{'per second':>14}{'speedup':>10}")
+    for mode, count, seconds in rows:
+        rate = count / seconds
+        print(f"{mode:<28}{count:>12}{seconds:>10.2f}{rate:>14.0f}{rate / baseline:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Benchmark suite for the bee simulation
+
+Generates synthetic worlds of increasing size, then times loading them
+(main.load_config(), the bulk reader behind read_map()), Map.update() and
+Map.print_map(), and records throughput in entity-ticks per second and the
+peak memory of each run. Every size runs in a fresh process so peak memory
+is not inherited from a previous, larger run.
+
+Results are saved as JSON; pass an earlier file with --compare to see the
+change per size, e.g. between two versions.
+
+Example: python3 bench_simulation.py --sizes 100 10000 1000000 --output bench.json
+"""
+
+import argparse
+import io
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+
+HIVE_TYPES = "BDHW"  # hive lines of the h1.py format
+
+
+def make_config(entities, bee_fraction=0.5, hive_format=False, seed=0, cells_per_entity=4):
+    """Returns the text of a world with about entities flowers and bees on a
+    square map of about cells_per_entity cells per entity. With hive_format the
+    bees live in B/D/H/W hives as read by h1.py, otherwise the main.py format
+    with one line per bee is used."""
+    rng = random.Random(seed)
+    size = max(3, math.isqrt(entities * cells_per_entity))
+    bees = int(entities * bee_fraction)
+    flowers = entities - bees
+    lines = [f"{size} 100 s max"]
+    for _ in range(flowers):
+        pollen = rng.randint(0, 5)
+        lines.append(f"F {rng.randrange(size)} {rng.randrange(size)} {pollen}")
+        if hive_format:
+            lines.extend(f"p{rng.randrange(10)}" for _ in range(pollen))
+    if not hive_format:
+        for _ in range(bees):
+            lines.append(f"B {rng.randrange(size)} {rng.randrange(size)} {rng.randint(1, 3)} {rng.randint(1, 5)}")
+        return "\n".join(lines) + "\n"
+    while bees > 0:
+        members = min(bees, rng.randint(1, 50))
+        hive = rng.choice(HIVE_TYPES)
+        lines.append(f"{hive} {rng.randrange(size)} {rng.randrange(size)} {members}")
+        for _ in range(members):
+            lines.append(f"{rng.randint(1, 3)}" if hive == "W" else f"{rng.randint(1, 3)} {rng.randint(1, 5)}")
+        bees -= members
+    return "\n".join(lines) + "\n"
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(entities, ticks, render_ticks, bee_fraction, hive_format):
+    """Times one world size in the current process and returns its metrics."""
+    config = make_config(entities, bee_fraction, hive_format)
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as config_file:
+        config_file.write(config)
+    result = {"entities": entities, "ticks": ticks, "render_ticks": render_ticks,
+              "format": "h1" if hive_format else "main"}
+    try:
+        if hive_format:
+            import h1
+            load = h1.read_map
+        else:
+            import main
+            load = lambda path: main.load_config(path)[0]
+        start = time.perf_counter()
+        world_map = load(config_file.name)
+        result["load_seconds"] = time.perf_counter() - start
+        result["load_entities_per_second"] = entities / result["load_seconds"]
+
+        # h1.py builds the handin1api map, which may lack the simulation loop
+        if hasattr(world_map, "update"):
+            start = time.perf_counter()
+            for _ in range(ticks):
+                world_map.update()
+            result["update_seconds"] = time.perf_counter() - start
+            result["update_entity_ticks_per_second"] = entities * ticks / result["update_seconds"]
+        if hasattr(world_map, "print_map") and render_ticks:
+            stdout, sys.stdout = sys.stdout, io.StringIO()
+            try:
+                start = time.perf_counter()
+                for _ in range(render_ticks):
+                    world_map.print_map()
+                    sys.stdout.seek(0)
+                    sys.stdout.truncate()
+                result["render_seconds"] = time.perf_counter() - start
+            finally:
+                sys.stdout = stdout
+            result["render_entity_ticks_per_second"] = entities * render_ticks / result["render_seconds"]
+    finally:
+        os.unlink(config_file.name)
+    result["peak_memory_mb"] = peak_memory_mb()
+    return result
+
+
+def run_isolated(*args):
+    """Runs run_case() in a fresh process so each size gets its own peak memory."""
+    with multiprocessing.get_context().Pool(1, maxtasksperchild=1) as pool:
+        return pool.apply(run_case, args)
+
+
+def compare(results, baseline_path):
+    """Prints each throughput of results relative to the same size in baseline_path."""
+    with open(baseline_path) as baseline_file:
+        baseline = {(case["entities"], case["format"]): case
+                    for case in json.load(baseline_file)["results"]}
+    for case in results:
+        old = baseline.get((case["entities"], case["format"]))
+        if old is None:
+            continue
+        changes = []
+        for key in ("load_entities_per_second", "update_entity_ticks_per_second",
+                    "render_entity_ticks_per_second"):
+            if key in case and key in old:
+                changes.append(f"{key.split('_')[0]} {case[key] / old[key]:.2f}x")
+        print(f"{case['entities']:>9} entities: " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bee simulation across world sizes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10 ** e for e in range(2, 7)],
+                        help="Entity counts to run (default: 100 to 1000000)")
+    parser.add_argument("--ticks", type=int, default=10, help="Map.update() ticks per size (default: 10)")
+    parser.add_argument("--render-ticks", type=int, default=1,
+                        help="Map.print_map() calls per size (default: 1)")
+    parser.add_argument("--bee-fraction", type=float, default=0.5,
+                        help="Share of the entities that are bees (default: 0.5)")
+    parser.add_argument("--hives", action="store_true",
+                        help="Generate h1.py worlds with B/D/H/W hives (needs handin1api)")
+    parser.add_argument("--output", default="bench_simulation.json", help="JSON file for the results")
+    parser.add_argument("--compare", metavar="JSON", help="Earlier results to compare against")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'entities':>9}{'load/s':>14}{'update ent-ticks/s':>20}{'render ent/s':>14}{'peak MB':>10}")
+    for entities in args.sizes:
+        case = run_isolated(entities, args.ticks, args.render_ticks, args.bee_fraction, args.hives)
+        results.append(case)
+        print(f"{entities:>9}{case['load_entities_per_second']:>14.0f}"
+              f"{case.get('update_entity_ticks_per_second', 0):>20.0f}"
+              f"{case.get('render_entity_ticks_per_second', 0):>14.0f}{case['peak_memory_mb']:>10.1f}")
+
+    with open(args.output, "w") as output:
+        json.dump({"python": platform.python_version(), "platform": platform.platform(),
+                   "results": results}, output, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,140 @@
-import sys  
-import stdio 
+import argparse
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import stdio
+from genomics import read_records
+
+START_CODON = 'ATG'
+STOP_CODONS = ('TAA', 'TAG', 'TGA')
+
+# Zero-width so that overlapping codons in different frames are all found
+CODON_PATTERN = re.compile(r'(?=(ATG|TAA|TAG|TGA))')
+COMPLEMENT = str.maketrans('ACGT', 'TGCA')
+
+# Candidates evaluated (and shipped to a worker process) at a time in batch mode
+BATCH_SIZE = 10000
 
 def isPotentialGene(dna):
     if (len(dna)%3 ) !=0: 
         return False 
-    if not dna.startswith('ATG'): 
+    if not dna.startswith(START_CODON):
         return False 
-    for i in range(len(dna)-3):
-        if i%3 ==0:
-            if dna[i:i+3] == 'TAA':
-                 return False
-            if dna[i:i+3] == 'TAG':
-                 return False 
-            if dna[i:i+3] =='TGA':
-                 return False 
-    if dna.endswith('TAA'): 
-        return True 
-    if dna.endswith('TGA'):
-        return True 
-    if dna.endswith('TAG'):
-        return True 
-    return False
-
-dna = sys.argv[1]
-stdio.writeln(isPotentialGene(dna))
\ No newline at end of file
+    # Only codons in frame matter, the last one is checked below
+    for i in range(0, len(dna)-3, 3):
+        if dna[i:i+3] in STOP_CODONS:
+            return False
+    return dna.endswith(STOP_CODONS)
+
+def scan_genes(dna):
+    """Yields (start, end, frame) for every potential gene dna[start:end] in one
+    pass over dna, as soon as its stop codon is reached.
+
+    Every substring accepted by isPotentialGene() is reported: an ATG followed in
+    frame by a stop codon, with no stop codon in between. Genes sharing a stop
+    codon (nested ATGs) are reported in order of their start."""
+    pending = ([], [], [])  # ATG positions waiting for a stop codon, per frame
+    for match in CODON_PATTERN.finditer(dna):
+        pos = match.start()
+        starts = pending[pos % 3]
+        if match.group(1) == START_CODON:
+            starts.append(pos)
+        elif starts:
+            for start in starts:
+                yield start, pos + 3, pos % 3
+            starts.clear()
+
+def find_genes(dna, reverse=False):
+    """Yields (start, end, strand, frame, gene) for every potential gene of dna,
+    also scanning the reverse complement when reverse is set. Coordinates always
+    refer to dna; on the '-' strand gene is the reverse complement of dna[start:end]."""
+    for start, end, frame in scan_genes(dna):
+        yield start, end, '+', frame, dna[start:end]
+    if reverse:
+        complement = dna.translate(COMPLEMENT)[::-1]
+        n = len(dna)
+        for start, end, frame in scan_genes(complement):
+            yield n - end, n - start, '-', frame, complement[start:end]
+
+def check_candidates(candidates):
+    """Returns isPotentialGene() of each candidate line (surrounding whitespace ignored)."""
+    return [isPotentialGene(candidate.strip()) for candidate in candidates]
+
+def read_batches(stream, batch_size=BATCH_SIZE):
+    """Yields the lines of stream in lists of at most batch_size lines."""
+    batch = []
+    for line in stream:
+        batch.append(line)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def check_batches(batches, workers=1):
+    """Yields check_candidates() of each batch, in input order. With several
+    workers the batches are evaluated in a process pool, keeping only a few
+    batches per worker in flight so memory stays bounded for any input size."""
+    if workers <= 1:
+        for batch in batches:
+            yield check_candidates(batch)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(check_candidates, batch))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def run_batch(stream, out, workers=1, batch_size=BATCH_SIZE):
+    """Checks the candidates read one per line from stream and writes one result
+    per line to out, in input order, with a single write per batch."""
+    for results in check_batches(read_batches(stream, batch_size), workers):
+        out.write(''.join(f"{result}\n" for result in results))
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Checks whether DNA strings, or the records of genome files, are potential genes",
+        epilog="Example: python3 dnasearch.py ATGCGCTAA"
+    )
+    parser.add_argument("dna", nargs="*", help="DNA strings or genome files (FASTA or line-wrapped)")
+    parser.add_argument("--scan", action="store_true",
+                        help="List every potential gene found in the input instead")
+    parser.add_argument("--reverse", action="store_true",
+                        help="With --scan, also search the reverse complement")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Check the candidates listed one per line in FILE ('-' for standard input)")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="With --batch, check the candidates in N processes (default: 1)")
+    args = parser.parse_intermixed_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.batch is None and not args.dna:
+        parser.error("expected DNA strings, genome files or --batch")
+
+    if args.batch == '-':
+        run_batch(sys.stdin, sys.stdout, args.workers)
+    elif args.batch is not None:
+        with open(args.batch) as candidates:
+            run_batch(candidates, sys.stdout, args.workers)
+
+    # Arguments naming genome files are handled one record at a time;
+    # anything else is taken to be the DNA string itself
+    for arg in args.dna:
+        if os.path.isfile(arg):
+            records = ((name, ''.join(chunks)) for name, chunks in read_records([arg]))
+        else:
+            records = [(None, arg)]
+        for name, dna in records:
+            if not args.scan:
+                stdio.writeln(isPotentialGene(dna) if name is None else f"{name}: {isPotentialGene(dna)}")
+                continue
+            for start, end, strand, frame, gene in find_genes(dna, args.reverse):
+                stdio.writeln(f"{name or 'dna'}\t{start}\t{end}\t{strand}\t{frame}\t{gene}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# eventsim.py
+"""
+Next-event engine for the bee simulation.
+
+Map.update() moves every bee on every tick and then looks at its cell. Here
+the only events are landings on a cell whose flowers still have pollen, and
+bee objects are only touched at those events: run_events(world_map, ticks)
+leaves the map exactly as ticks calls to world_map.update() would.
+
+With numpy, the positions of all bees are computed a block of ticks at a
+time from their trajectory tables, as arrays, and the cells with pollen are
+looked up in one go; the landings come out in (tick, bee order), which is
+the order the tick loop meets them in. Without numpy, each bee is moved one
+tick at a time up to its next landing and the landings are queued on a heap.
+
+Either way every bee still draws one trajectory per tick, so the cost stays
+O(ticks x bees); what is saved is the per-tick Python work around the draws.
+
+This relies on each bee's moves depending only on its own state, which is
+the case for TrajectoryBees; a Compass drawing from the shared random module
+would be drawn from in a different order, so other bees are refused unless
+the caller vouches for their compasses.
+"""
+import heapq
+from trajectories import TrajectoryBee
+
+try:
+    import numpy as np
+except ImportError:  # run_events() then moves the bees one tick at a time
+    np = None
+
+# Ticks of positions computed at a time, bounding the (ticks x bees) arrays
+STREAM_BLOCK = 256
+
+
+def run_events(world_map, ticks, independent=False):
+    """Advances world_map by ticks ticks and returns the number of events handled.
+
+    Raises ValueError if a bee is not a TrajectoryBee, unless independent is
+    set to say every compass keeps its own random state."""
+    bees = list(world_map.bees)
+    for population in world_map.populations:
+        bees.extend(population.bees)  # update() moves populations after single bees
+    trajectories = all(isinstance(bee, TrajectoryBee) for bee in bees)
+    if not independent and not trajectories:
+        raise ValueError("run_events() needs bees with their own random state (TrajectoryBee)")
+    if np is not None and trajectories and bees:
+        return _run_streams(world_map, bees, ticks)
+    return _run_stepwise(world_map, bees, ticks)
+
+
+def _run_streams(world_map, bees, ticks):
+    """run_events() on TrajectoryBees, STREAM_BLOCK ticks of positions at a time."""
+    size = world_map.size
+    flowers_at = world_map.flowers_at
+    rows = np.array([bee.row for bee in bees], dtype=np.int64)
+    cols = np.array([bee.col for bee in bees], dtype=np.int64)
+    handled = 0
+    done = 0
+    while done < ticks:
+        length = min(STREAM_BLOCK, ticks - done)
+        row_steps = np.empty((length, len(bees)), dtype=np.int64)
+        col_steps = np.empty((length, len(bees)), dtype=np.int64)
+        for index, bee in enumerate(bees):
+            trajectory = bee.trajectory
+            if bee.moves + length > trajectory.base + len(trajectory.row_steps):
+                trajectory.extend(bee.moves + max(length, STREAM_BLOCK))
+            start = bee.moves - trajectory.base
+            row_steps[:, index] = trajectory.row_steps[start:start + length]
+            col_steps[:, index] = trajectory.col_steps[start:start + length]
+            bee.moves += length
+
+        # Bounding by the map makes each position depend on the last one
+        block_rows = np.empty_like(row_steps)
+        block_cols = np.empty_like(col_steps)
+        for tick in range(length):
+            rows = block_rows[tick] = np.clip(rows + row_steps[tick], 0, size - 1)
+            cols = block_cols[tick] = np.clip(cols + col_steps[tick], 0, size - 1)
+
+        # Pollen only ever decreases, so cells that are empty now can be skipped
+        pollen = np.zeros((size, size), dtype=bool)
+        for (row, col), flowers in flowers_at.items():
+            if 0 <= row < size and 0 <= col < size and any(flower.has_pollen() for flower in flowers):
+                pollen[row, col] = True
+        landings = pollen[block_rows, block_cols]
+        landings &= ~np.array([bee.carrying_pollen for bee in bees])
+
+        # np.nonzero() lists the landings by tick, then by bee order
+        for tick, index in zip(*(axis.tolist() for axis in np.nonzero(landings))):
+            bee = bees[index]
+            if bee.carrying_pollen:
+                continue  # A bee carrying pollen never collects again in this simulation
+            flowers = flowers_at[(int(block_rows[tick, index]), int(block_cols[tick, index]))]
+            if any(flower.has_pollen() for flower in flowers):
+                handled += 1
+                for flower in flowers:
+                    bee.collect_pollen(flower)
+        done += length
+
+    for bee, row, col in zip(bees, rows.tolist(), cols.tolist()):
+        bee.row = row
+        bee.col = col
+    return handled
+
+
+def _run_stepwise(world_map, bees, ticks):
+    """run_events() moving each bee one tick at a time up to its next landing."""
+    size = world_map.size
+    flowers_at = world_map.flowers_at
+    moves_done = [0] * len(bees)
+    events = []
+
+    def schedule(index):
+        # Pollen only ever decreases, so cells that are empty now can be skipped
+        bee = bees[index]
+        while moves_done[index] < ticks:
+            bee.move(size)
+            moves_done[index] += 1
+            flowers = flowers_at.get((bee.row, bee.col))
+            if flowers and any(flower.has_pollen() for flower in flowers):
+                heapq.heappush(events, (moves_done[index], index))
+                return
+
+    for index, bee in enumerate(bees):
+        if not bee.carrying_pollen:
+            schedule(index)
+
+    handled = 0
+    while events:
+        _, index = heapq.heappop(events)
+        bee = bees[index]
+        flowers = flowers_at[(bee.row, bee.col)]
+        if any(flower.has_pollen() for flower in flowers):
+            handled += 1
+            for flower in flowers:
+                bee.collect_pollen(flower)
+        # A bee carrying pollen never collects again in this simulation
+        if not bee.carrying_pollen:
+            schedule(index)
+
+    # Bees that are done interacting still finish their moves
+    for index, bee in enumerate(bees):
+        for _ in range(ticks - moves_done[index]):
+            bee.move(size)
+    return handled
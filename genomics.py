@@ -1,11 +1,347 @@
+import argparse
+import mmap
+import os
 import sys
+import heapq
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from operator import itemgetter
+
+try:
+    import numpy as np
+except ImportError:  # the array engine is optional, the dict path works without it
+    np = None
+
+# 2-bit codes for the four bases; any other symbol breaks the rolling hash
+BASE_CODES = {"A": 0, "C": 1, "G": 2, "T": 3}
+BASES = "ACGT"
+
+# Characters read from stdin (or a mapped file) per chunk in streaming mode
+CHUNK_SIZE = 1 << 20
+
+# Bytes dropped from sequence lines of genome files
+LINE_BREAKS = b" \t\r\n"
+
+# Largest k counted into a dense array of 4**k slots (4**12 int64 counts = 128 MB)
+ARRAY_MAX_K = 12
+
+# Genome positions encoded per numpy block, bounding the temporary arrays
+BLOCK_SIZE = 1 << 22
+
+# Largest k whose 2-bit codes fit in an int64, for the parallel code tables
+CODE_MAX_K = 31
+
+if np is not None:
+    # Byte -> base code; anything that is not A/C/G/T maps to 4
+    CODE_TABLE = np.full(256, 4, dtype=np.uint8)
+    for _base, _code in BASE_CODES.items():
+        CODE_TABLE[ord(_base)] = _code
 
 def read_genome():
     """Reads the genome from standard input and returns it as a string."""
     genome = sys.stdin.read().strip()
     return genome
 
+def map_genome_file(path):
+    """Memory-maps the genome file at path read-only."""
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return b""  # mmap refuses empty files
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+def find_records(data, name):
+    """Yields (name, start, end) for each record of a mapped genome file.
+
+    FASTA records start at a '>' header line and are named after it; sequence
+    before the first header (the whole file when there is none) is named name."""
+    pos = 0
+    while pos < len(data):
+        if data[pos:pos + 1] == b">":
+            eol = data.find(b"\n", pos)
+            eol = len(data) if eol < 0 else eol
+            record_name = data[pos + 1:eol].decode("ascii", "replace").strip()
+            start = min(eol + 1, len(data))
+        else:
+            record_name = name
+            start = pos
+        header = data.find(b"\n>", max(start - 1, 0))
+        end = len(data) if header < 0 else header + 1
+        yield record_name, start, end
+        pos = end
+
+def sequence_chunks(data, start, end, chunk_size=CHUNK_SIZE):
+    """Yields the sequence in data[start:end] in chunks of at most chunk_size
+    bytes, with line breaks removed, copying only one chunk at a time."""
+    for pos in range(start, end, chunk_size):
+        chunk = data[pos:min(pos + chunk_size, end)].translate(None, LINE_BREAKS)
+        if chunk:
+            yield chunk.decode("ascii", "replace")
+
+def read_records(paths, chunk_size=CHUNK_SIZE):
+    """Yields (name, chunks) for each record of the genome files at paths, where
+    chunks iterates over the record's sequence as sequence_chunks() does.
+    Each chunks iterator must be consumed before moving to the next record."""
+    for path in paths:
+        data = map_genome_file(path)
+        for name, start, end in find_records(data, path):
+            yield name, sequence_chunks(data, start, end, chunk_size)
+
+def read_chunks(stream, chunk_size=CHUNK_SIZE):
+    """Yields the contents of stream in chunks of at most chunk_size characters,
+    with leading and trailing whitespace of the whole input removed (as read_genome() does)."""
+    pending = ""  # trailing whitespace held back until we know more input follows
+    started = False
+    for chunk in iter(lambda: stream.read(chunk_size), ""):
+        if not started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                continue
+            started = True
+        chunk = pending + chunk
+        body = chunk.rstrip()
+        pending = chunk[len(body):]
+        if body:
+            yield body
+
+def iter_k_gram_codes(chunks, k, other_k_grams):
+    """Yields one integer key per k-gram in the sequence spread over chunks.
+
+    k-grams made only of A/C/G/T are keyed by their 2-bit encoding, kept up to
+    date with a rolling hash. Any other k-gram is keyed by a negative index into
+    other_k_grams (a dict of k-gram -> key that this function extends), or by
+    the k-gram string itself when other_k_grams is None."""
+    mask = (1 << (2 * k)) - 1
+    code = 0
+    run = 0       # consecutive A/C/G/T symbols ending at the current position
+    seen = 0      # symbols processed so far
+    overlap = ""  # last k-1 symbols of the previous chunk
+    for chunk in chunks:
+        text = overlap + chunk
+        for i in range(len(overlap), len(text)):
+            base = BASE_CODES.get(text[i])
+            if base is None:
+                run = 0
+            else:
+                code = ((code << 2) | base) & mask
+                run += 1
+            seen += 1
+            if seen < k:
+                continue
+            if run >= k:
+                yield code
+            else:
+                k_gram = text[i - k + 1:i + 1]
+                if other_k_grams is None:
+                    yield k_gram
+                    continue
+                key = other_k_grams.get(k_gram)
+                if key is None:
+                    key = other_k_grams[k_gram] = -len(other_k_grams) - 1
+                yield key
+        overlap = text[-(k - 1):] if k > 1 else ""
+
+def stream_k_grams(chunks, k):
+    """Computes the frequency of k-grams in the genome spread over chunks (as
+    produced by read_chunks() or read_records()), holding at most one chunk
+    of the input in memory at a time.
+
+    Returns the counts keyed as by iter_k_gram_codes(), the total number
+    of k-grams and the list needed to decode the negative keys."""
+    if k < 1:
+        raise ValueError("k must be at least 1 in streaming mode")
+    k_gram_counts = {}
+    total_k_grams = 0
+    other_k_grams = {}
+
+    for key in iter_k_gram_codes(chunks, k, other_k_grams):
+        k_gram_counts[key] = k_gram_counts.get(key, 0) + 1
+        total_k_grams += 1
+
+    return k_gram_counts, total_k_grams, list(other_k_grams)
+
+class SpaceSaving:
+    """Approximate heavy hitters over a stream of k-gram keys in bounded memory,
+    using the Space-Saving algorithm (Metwally, Agrawal and El Abbadi, 2005).
+
+    At most capacity keys are monitored. When a new key arrives and the table is
+    full, the key with the smallest count is evicted and the newcomer inherits
+    that count, so every reported count overestimates the true one by at most
+    total / capacity, and any k-gram occurring more often than that is kept."""
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}  # key -> how much of its count may have been inherited
+        self.heap = []    # (count, arrival, key) per monitored key, counts possibly stale
+        self.total = 0
+
+    def add(self, key):
+        """Counts one occurrence of key."""
+        self.total += 1
+        count = self.counts.get(key)
+        if count is not None:
+            self.counts[key] = count + 1
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = 1
+            self.errors[key] = 0
+            heapq.heappush(self.heap, (1, self.total, key))
+        else:
+            # Counts only grow, so a stale heap entry is refreshed and pushed
+            # back until the smallest entry is up to date
+            while True:
+                count, arrival, victim = self.heap[0]
+                if self.counts[victim] == count:
+                    break
+                heapq.heapreplace(self.heap, (self.counts[victim], arrival, victim))
+            heapq.heapreplace(self.heap, (count + 1, self.total, key))
+            del self.counts[victim]
+            del self.errors[victim]
+            self.counts[key] = count + 1
+            self.errors[key] = count
+
+    def error_bound(self):
+        """Returns the largest amount by which a reported count can exceed the true one."""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+def approximate_k_grams(chunks, k, capacity):
+    """Estimates the most frequent k-grams of the genome spread over chunks while
+    holding at most capacity k-grams and one chunk of input in memory.
+
+    Returns the SpaceSaving summary; its keys are as produced by
+    iter_k_gram_codes() without a table of other k-grams."""
+    if k < 1:
+        raise ValueError("k must be at least 1 in streaming mode")
+    summary = SpaceSaving(capacity)
+    for key in iter_k_gram_codes(chunks, k, None):
+        summary.add(key)
+    return summary
+
+def decode_k_gram(key, k, other_k_grams=()):
+    """Turns a key produced by iter_k_gram_codes() back into the k-gram string."""
+    if isinstance(key, str):
+        return key
+    if key < 0:
+        return other_k_grams[-key - 1]
+    return "".join(BASES[(key >> (2 * (k - 1 - j))) & 3] for j in range(k))
+
+def _encode_block(text, k, dtype=None):
+    """Returns the 2-bit codes of every k-gram of text and a mask telling
+    which of them consist only of A/C/G/T (the other codes are meaningless)."""
+    symbols = CODE_TABLE[np.frombuffer(text.encode("ascii", "replace"), dtype=np.uint8)]
+    n = len(text) - k + 1
+    invalid = np.concatenate(([0], np.cumsum(symbols > 3)))
+    valid = invalid[k:] == invalid[:n]
+    codes = np.zeros(n, dtype=dtype or np.uint32)
+    for j in range(k):
+        codes <<= 2
+        codes |= symbols[j:j + n] & 3
+    return codes, valid
+
+class KGramArray:
+    """k-gram table for small k backed by a dense array: slot code holds the value
+    of the k-gram whose 2-bit encoding is code. k-grams containing other symbols
+    are kept in the others dict, with their first position in first_seen."""
+
+    def __init__(self, genome, k, values, others, first_seen):
+        self.genome = genome
+        self.k = k
+        self.values = values
+        self.others = others
+        self.first_seen = first_seen
+
+    def scaled(self, factor_fn):
+        """Returns a table over the same k-grams with every value mapped by factor_fn."""
+        others = {k_gram: factor_fn(value) for k_gram, value in self.others.items()}
+        return KGramArray(self.genome, self.k, factor_fn(self.values), others, self.first_seen)
+
+    def _first_positions(self, wanted, needed):
+        """Scans the genome for the first position of the codes in wanted, stopping
+        once every code in needed and limit other codes have been found."""
+        codes_wanted = np.zeros(self.values.size, dtype=bool)
+        codes_wanted[list(wanted)] = True
+        positions = {}
+        for start in range(0, len(self.genome) - self.k + 1, BLOCK_SIZE):
+            codes, valid = _encode_block(self.genome[start:start + BLOCK_SIZE + self.k - 1], self.k)
+            hits = np.flatnonzero(valid & codes_wanted[codes])
+            found, index = np.unique(codes[hits], return_index=True)
+            for i in np.argsort(index, kind="stable").tolist():
+                code = int(found[i])
+                if code not in positions:
+                    positions[code] = start + int(hits[index[i]])
+            if needed(positions):
+                break
+        return positions
+
+    def top(self, top_n):
+        """Returns the top_n k-grams by value as (k_gram, value) pairs, ties broken
+        by first occurrence in the genome like the dict path."""
+        values = self.values
+        present = int(np.count_nonzero(values))
+        m = min(top_n, present)
+        if m > 0:
+            idx = np.argpartition(values, values.size - m)[values.size - m:]
+            array_best = values[idx].tolist()
+        else:
+            array_best = []
+        best = heapq.nlargest(top_n, array_best + list(self.others.values()))
+        if not best:
+            return []
+        threshold = best[-1]
+
+        # Winners above the threshold are certain; the remaining places go to
+        # the earliest of the k-grams tied at the threshold
+        above = [int(code) for code in idx[values[idx] > threshold]] if m > 0 else []
+        tied = np.flatnonzero(values == threshold).tolist() if m > 0 else []
+        others_above = [g for g, value in self.others.items() if value > threshold]
+        others_tied = [g for g, value in self.others.items() if value == threshold]
+        places = top_n - len(above) - len(others_above)
+
+        def needed(positions):
+            found_above = sum(1 for code in above if code in positions)
+            found_tied = len(positions) - found_above
+            return found_above == len(above) and found_tied >= min(places, len(tied))
+
+        positions = self._first_positions(above + tied, needed)
+        ranked = [(-values[code].item(), positions[code], decode_k_gram(code, self.k))
+                  for code in above]
+        ranked += [(-self.others[g], self.first_seen[g], g) for g in others_above]
+        boundary = [(positions[code], decode_k_gram(code, self.k))
+                    for code in tied if code in positions]
+        boundary += [(self.first_seen[g], g) for g in others_tied]
+        boundary = sorted(boundary)[:places]
+        ranked += [(-threshold, position, k_gram) for position, k_gram in boundary]
+        ranked.sort()
+        return [(k_gram, -value) for value, _, k_gram in ranked]
+
+def compute_k_grams_array(genome, k, block_size=BLOCK_SIZE):
+    """Computes the frequency of k-grams in the genome with numpy, counting
+    the 2-bit codes of each block of the genome with bincount.
+
+    k-grams containing symbols other than A/C/G/T are counted by string like
+    compute_k_grams() does. Requires numpy and 1 <= k <= ARRAY_MAX_K."""
+    counts = np.zeros(4 ** k, dtype=np.int64)
+    others = {}
+    first_seen = {}
+    total_k_grams = max(len(genome) - k + 1, 0)
+
+    for start in range(0, total_k_grams, block_size):
+        text = genome[start:start + block_size + k - 1]
+        codes, valid = _encode_block(text, k)
+        counts += np.bincount(codes[valid], minlength=counts.size)
+        for i in np.flatnonzero(~valid).tolist():
+            k_gram = text[i:i + k]
+            if k_gram not in others:
+                others[k_gram] = 0
+                first_seen[k_gram] = start + i
+            others[k_gram] += 1
+
+    return KGramArray(genome, k, counts, others, first_seen), total_k_grams
+
 def compute_k_grams(genome, k):
     """Computes the frequency of k-grams in the genome."""
     k_gram_counts = defaultdict(int)
@@ -19,8 +355,147 @@ def compute_k_grams(genome, k):
 
     return k_gram_counts, total_k_grams
 
+def _count_shard_codes(shard, k):
+    """Worker for compute_k_grams_parallel() on the code table path.
+
+    Returns (keys, counts, first, others): the shard's k-grams keyed as by
+    iter_k_gram_codes() (negative keys index the others list), with their
+    counts and the shard position of their first occurrence. With numpy
+    and k <= CODE_MAX_K these are int64 arrays, else keys and counts come
+    as a dict in first-seen order and first is None."""
+    if np is None or k > CODE_MAX_K:
+        counts = {}
+        others = {}
+        for key in iter_k_gram_codes([shard], k, others):
+            counts[key] = counts.get(key, 0) + 1
+        return counts, None, None, list(others)
+
+    keys, counts, first = [], [], []
+    others = {}
+    for start in range(0, len(shard) - k + 1, BLOCK_SIZE):
+        text = shard[start:start + BLOCK_SIZE + k - 1]
+        codes, valid = _encode_block(text, k, np.uint64)
+        positions = np.flatnonzero(valid)
+        found, index, found_counts = np.unique(codes[positions], return_index=True, return_counts=True)
+        keys.append(found.astype(np.int64))
+        counts.append(found_counts)
+        first.append(positions[index] + start)
+        for i in np.flatnonzero(~valid).tolist():
+            k_gram = text[i:i + k]
+            if k_gram not in others:
+                others[k_gram] = [0, start + i]
+            others[k_gram][0] += 1
+    keys.append(-np.arange(1, len(others) + 1, dtype=np.int64))
+    counts.append(np.array([count for count, _ in others.values()], dtype=np.int64))
+    first.append(np.array([position for _, position in others.values()], dtype=np.int64))
+    keys, counts, first = _merge_codes(keys, counts, first)
+    return keys, counts, first, list(others)
+
+def _merge_codes(keys, counts, first):
+    """Merges lists of (keys, counts, first position) arrays into one table
+    holding each key once, with its total count and earliest position."""
+    keys = np.concatenate(keys)
+    counts = np.concatenate(counts)
+    first = np.concatenate(first)
+    if keys.size == 0:
+        return keys, counts, first
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    groups = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    return (keys[groups], np.add.reduceat(counts[order], groups),
+            np.minimum.reduceat(first[order], groups))
+
+def _count_shard_array(shard, k):
+    """Worker for compute_k_grams_parallel() on the array path; the shard text
+    itself is not sent back to the parent."""
+    table, total_k_grams = compute_k_grams_array(shard, k)
+    return table.values, table.others, table.first_seen, total_k_grams
+
+def compute_k_grams_parallel(genome, k, workers, top_n=None):
+    """Computes the frequency of k-grams in the genome with a pool of worker processes.
+
+    The genome is split into one shard per worker; each shard also holds the first
+    k-1 symbols of the next one, so every k-gram is counted in exactly one shard.
+    Small k use dense arrays (see compute_k_grams_array()); otherwise workers
+    send back integer-keyed code tables that are merged with numpy when it is
+    available. Either way ties keep the first-seen order, so the top N output
+    is identical to the serial path. With top_n, the returned counts only hold
+    the k-grams that can be among the top_n, which saves decoding the rest."""
+    total_k_grams = max(len(genome) - k + 1, 0)
+    step = max(-(-total_k_grams // workers), 1)
+    starts = list(range(0, total_k_grams, step))
+    shards = [genome[start:start + step + k - 1] for start in starts]
+    # Each worker sends back a whole 4**k array, which only pays off when the
+    # shards are at least that long
+    use_array = np is not None and 1 <= k <= ARRAY_MAX_K and 4 ** k <= step
+
+    with ProcessPoolExecutor(workers) as pool:
+        parts = list(pool.map(_count_shard_array if use_array else _count_shard_codes,
+                              shards, repeat(k)))
+
+    if use_array:
+        counts = np.zeros(4 ** k, dtype=np.int64)
+        others = {}
+        first_seen = {}
+        for start, (shard_counts, shard_others, shard_first_seen, _) in zip(starts, parts):
+            counts += shard_counts
+            for k_gram, count in shard_others.items():
+                if k_gram not in others:
+                    others[k_gram] = 0
+                    first_seen[k_gram] = start + shard_first_seen[k_gram]
+                others[k_gram] += count
+        return KGramArray(genome, k, counts, others, first_seen), total_k_grams
+
+    # Negative keys of each shard are renumbered into one list of other k-grams
+    other_keys = {}
+    for _, _, _, shard_others in parts:
+        for k_gram in shard_others:
+            if k_gram not in other_keys:
+                other_keys[k_gram] = -len(other_keys) - 1
+    other_k_grams = list(other_keys)
+
+    if parts and parts[0][2] is None:
+        key_counts = {}
+        for shard_counts, _, _, shard_others in parts:
+            for key, count in shard_counts.items():
+                if key < 0:
+                    key = other_keys[shard_others[-key - 1]]
+                key_counts[key] = key_counts.get(key, 0) + count
+        keys = list(key_counts)
+        if top_n is not None and key_counts:
+            threshold = heapq.nlargest(top_n, key_counts.values())[-1]
+            keys = [key for key in keys if key_counts[key] >= threshold]
+        return {decode_k_gram(key, k, other_k_grams): key_counts[key] for key in keys}, total_k_grams
+
+    if not parts:
+        return {}, total_k_grams
+    keys, counts, first = [], [], []
+    for start, (shard_keys, shard_counts, shard_first, shard_others) in zip(starts, parts):
+        if shard_others:
+            renumber = np.array([other_keys[k_gram] for k_gram in shard_others], dtype=np.int64)
+            negative = shard_keys < 0
+            shard_keys = shard_keys.copy()
+            shard_keys[negative] = renumber[-shard_keys[negative] - 1]
+        keys.append(shard_keys)
+        counts.append(shard_counts)
+        first.append(shard_first + start)
+    keys, counts, first = _merge_codes(keys, counts, first)
+    if top_n is not None and counts.size > top_n:
+        # Everything above the N-th count, then the earliest of those tied with it
+        threshold = np.partition(counts, counts.size - top_n)[counts.size - top_n]
+        above = np.flatnonzero(counts > threshold)
+        tied = np.flatnonzero(counts == threshold)
+        tied = tied[np.argsort(first[tied], kind="stable")[:top_n - above.size]]
+        wanted = np.concatenate((above, tied))
+        keys, counts, first = keys[wanted], counts[wanted], first[wanted]
+    order = np.argsort(first, kind="stable")
+    return {decode_k_gram(key, k, other_k_grams): count
+            for key, count in zip(keys[order].tolist(), counts[order].tolist())}, total_k_grams
+
 def compute_frequencies(k_gram_counts, total_k_grams):
     """Computes the frequency percentages of k-grams."""
+    if isinstance(k_gram_counts, KGramArray):
+        return k_gram_counts.scaled(lambda count: (count / max(total_k_grams, 1)) * 100)
     frequencies = {}
     for k_gram, count in k_gram_counts.items():
         frequency = (count / total_k_grams) * 100
@@ -29,24 +504,97 @@ def compute_frequencies(k_gram_counts, total_k_grams):
 
 def get_top_k_grams(frequencies, top_n=10):
     """Returns the top N k-grams sorted by frequency."""
+    if isinstance(frequencies, KGramArray):
+        return frequencies.top(top_n)
     sorted_k_grams = sorted(frequencies.items(), key=lambda item: item[1], reverse=True)
     return sorted_k_grams[:top_n]
 
-def main():
-    if len(sys.argv) != 2:
-        print("Usage: python3 <your_file_name>.py <k>")
-        sys.exit(1)
-
-    k = int(sys.argv[1])
-    genome = read_genome()
-    
-    k_gram_counts, total_k_grams = compute_k_grams(genome, k)
-    frequencies = compute_frequencies(k_gram_counts, total_k_grams)
-    top_k_grams = get_top_k_grams(frequencies)
-
-    # Output the results
+def get_top_k_gram_counts(k_gram_counts, total_k_grams, top_n=10):
+    """Returns the top N k-grams with their frequency percentages, in the same
+    order as get_top_k_grams(compute_frequencies(...)) but keeping only a heap of
+    N entries and computing the percentage for the winners alone."""
+    if isinstance(k_gram_counts, KGramArray):
+        best = k_gram_counts.top(top_n)
+    else:
+        # nlargest() is documented to match sorted(..., reverse=True)[:n], ties included
+        best = heapq.nlargest(top_n, k_gram_counts.items(), key=itemgetter(1))
+    return [(k_gram, (count / total_k_grams) * 100) for k_gram, count in best]
+
+def count_top_k_grams(chunks, k, args):
+    """Runs the counting mode selected on the command line over the sequence
+    spread over chunks. Returns the top k-grams with their frequencies and the
+    error bound of the frequencies (None when they are exact)."""
+    if args.approx:
+        summary = approximate_k_grams(chunks, k, args.approx)
+        top_k_grams = [(decode_k_gram(key, k), frequency) for key, frequency
+                       in get_top_k_gram_counts(summary.counts, summary.total)]
+        return top_k_grams, (summary.error_bound() / max(summary.total, 1)) * 100
+
+    if args.stream:
+        k_gram_counts, total_k_grams, other_k_grams = stream_k_grams(chunks, k)
+        top_k_grams = [(decode_k_gram(key, k, other_k_grams), frequency) for key, frequency
+                       in get_top_k_gram_counts(k_gram_counts, total_k_grams)]
+        return top_k_grams, None
+
+    genome = "".join(chunks)
+    if args.workers > 1 and k >= 1:
+        k_gram_counts, total_k_grams = compute_k_grams_parallel(genome, k, args.workers, top_n=10)
+    elif np is not None and 1 <= k <= ARRAY_MAX_K:
+        k_gram_counts, total_k_grams = compute_k_grams_array(genome, k)
+    else:
+        k_gram_counts, total_k_grams = compute_k_grams(genome, k)
+    return get_top_k_gram_counts(k_gram_counts, total_k_grams), None
+
+def print_top_k_grams(top_k_grams, error_bound):
+    """Prints the top k-grams, followed by the error bound for approximate results."""
     for k_gram, frequency in top_k_grams:
         print(f"{k_gram} with frequency {frequency:.02f} %")
+    if error_bound is not None:
+        print(f"Approximate: each frequency may be overestimated by up to {error_bound:.02f} %")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Prints the 10 most frequent k-grams of the genome read from the given "
+                    "files (FASTA or line-wrapped sequence) or from standard input",
+        epilog="Example: python3 genomics.py 3 < ems2.txt"
+    )
+    parser.add_argument("k", type=int, help="Length of the k-grams")
+    parser.add_argument("files", nargs="*",
+                        help="Genome files; their records are concatenated unless --per-record is given")
+    parser.add_argument("--per-record", action="store_true",
+                        help="Report each record of the genome files separately")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read the genome in chunks instead of all at once (for very large inputs)")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="Count the k-grams in N processes (default: 1)")
+    parser.add_argument("--approx", type=int, metavar="CAPACITY",
+                        help="Estimate the top k-grams from a stream while tracking at most "
+                             "CAPACITY distinct k-grams (for k too large for an exact table)")
+    args = parser.parse_intermixed_args()
+    k = args.k
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if (args.stream or args.approx) and args.workers > 1:
+        parser.error("--workers cannot be combined with --stream or --approx")
+    if args.approx is not None and args.approx < 1:
+        parser.error("--approx must be at least 1")
+    if (args.stream or args.approx) and k < 1:
+        parser.error("k must be at least 1 with --stream or --approx")
+    if args.per_record and not args.files:
+        parser.error("--per-record needs genome files")
+    for path in args.files:
+        if not os.path.isfile(path):
+            parser.error(f"genome file '{path}' not found")
+
+    if not args.files:
+        print_top_k_grams(*count_top_k_grams(read_chunks(sys.stdin), k, args))
+    elif args.per_record:
+        for name, chunks in read_records(args.files):
+            print(f">{name}")
+            print_top_k_grams(*count_top_k_grams(chunks, k, args))
+    else:
+        chunks = (chunk for _, record in read_records(args.files) for chunk in record)
+        print_top_k_grams(*count_top_k_grams(chunks, k, args))
 
 if __name__ == "__main__":
     main()
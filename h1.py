@@ -1,93 +1,91 @@
 from handin1api import *
 from compass import Compass
+from worldconfig import ConfigError, read_config_lines
 import stdio
 
-def read_map():
-    # Read the first line for configuration parameters
+# Hive line type -> (hive class, bee class, Map method adding the hive)
+BEE_HIVES = {
+    'B': (BeeHive, Bee, 'add_beehive'),
+    'D': (DesertBeeHive, DesertBee, 'add_desert_beehive'),
+    'H': (HoneyBeeHive, HoneyBee, 'add_honey_beehive'),
+}
+
+def parse_config(lines):
+    """Builds the world from the list of lines of a configuration and returns
+    the map. Raises ConfigError with the message to print if it is invalid.
+
+    Objects are numbered by their own lines only, the pollen and bee lines
+    that follow a flower or hive do not count."""
     try:
-        config_line = stdio.readString()
-        n, duration, pollen_type, pollen_action = config_line.split()
+        # Read the first line for configuration parameters
+        n, duration, pollen_type, pollen_action = lines[0].split()
         n = int(n)
         duration = int(duration)
-        
+
         # Validate pollen type and action
-        if pollen_type not in ['s', 'f']:
-            stdio.writeln("ERROR: Invalid configuration line")
-            return
-        if pollen_action not in ['max', 'min', 'sum', 'sort']:
-            stdio.writeln("ERROR: Invalid configuration line")
-            return
-        
+        if pollen_type not in ('s', 'f'):
+            raise ConfigError("ERROR: Invalid configuration line")
+        if pollen_action not in ('max', 'min', 'sum', 'sort'):
+            raise ConfigError("ERROR: Invalid configuration line")
+
         # Create the map
         world_map = Map(n)
 
         # Read the subsequent lines for flowers and hives
         line_number = 1
-        while True:
-            line = stdio.readString()
-            if line == "":
-                break  # End of input
-            
-            parts = line.split()
+        index = 1
+        while index < len(lines) and lines[index] != "":
+            parts = lines[index].split()
+            index += 1
             if not parts:
-                stdio.writeln(f"ERROR: Invalid object setup on line {line_number}")
-                return
-            
+                raise ConfigError(f"ERROR: Invalid object setup on line {line_number}")
+
             obj_type = parts[0]
+            if obj_type not in ('F', 'B', 'D', 'H', 'W') or len(parts) != 4:
+                raise ConfigError(f"ERROR: Invalid object setup on line {line_number}")
+            x, y, count = map(int, parts[1:])
+            members = lines[index:index + max(count, 0)]
+            if len(members) < count:
+                raise ConfigError("ERROR: Invalid configuration line")
+            index += len(members)
+
             if obj_type == 'F':
-                # Flower configuration
-                if len(parts) != 4:
-                    stdio.writeln(f"ERROR: Invalid object setup on line {line_number}")
-                    return
-                x, y, num_pollen = map(int, parts[1:])
+                # Flower configuration followed by one line per pollen granule
                 flower = Flower(x, y, pollen_type)
-                for _ in range(num_pollen):
-                    pollen_info = stdio.readString()
-                    pollen = Pollen(pollen_info)
-                    flower.add_pollen(pollen)
+                for pollen_info in members:
+                    flower.add_pollen(Pollen(pollen_info))
                 world_map.add_flower(flower)
-            elif obj_type in ['B', 'D', 'H', 'W']:
-                # Hive configuration
-                if len(parts) != 4:
-                    stdio.writeln(f"ERROR: Invalid object setup on line {line_number}")
-                    return
-                x, y, num_entities = map(int, parts[1:])
-                if obj_type == 'B':
-                    hive = BeeHive(x, y, num_entities)
-                    for _ in range(num_entities):
-                        speed, perception = map(int, stdio.readString().split())
-                        bee = Bee(x, y, speed, perception)
-                        hive.add_bee(bee)
-                    world_map.add_beehive(hive)
-                elif obj_type == 'D':
-                    hive = DesertBeeHive(x, y, num_entities)
-                    for _ in range(num_entities):
-                        speed, perception = map(int, stdio.readString().split())
-                        bee = DesertBee(x, y, speed, perception)
-                        hive.add_bee(bee)
-                    world_map.add_desert_beehive(hive)
-                elif obj_type == 'H':
-                    hive = HoneyBeeHive(x, y, num_entities)
-                    for _ in range(num_entities):
-                        speed, perception = map(int, stdio.readString().split())
-                        bee = HoneyBee(x, y, speed, perception)
-                        hive.add_bee(bee)
-                    world_map.add_honey_beehive(hive)
-                elif obj_type == 'W':
-                    hive = WaspHive(x, y, num_entities)
-                    for _ in range(num_entities):
-                        speed = int(stdio.readString())
-                        wasp = Wasp(x, y, speed)
-                        hive.add_wasp(wasp)
-                    world_map.add_wasphive(hive)
+            elif obj_type == 'W':
+                # Wasp hive followed by one speed line per wasp
+                hive = WaspHive(x, y, count)
+                for speed in members:
+                    hive.add_wasp(Wasp(x, y, int(speed)))
+                world_map.add_wasphive(hive)
             else:
-                stdio.writeln(f"ERROR: Invalid object setup on line {line_number}")
-                return
-            
+                # Bee hive followed by one "speed perception" line per bee
+                hive_class, bee_class, add_hive = BEE_HIVES[obj_type]
+                hive = hive_class(x, y, count)
+                for member in members:
+                    speed, perception = map(int, member.split())
+                    hive.add_bee(bee_class(x, y, speed, perception))
+                getattr(world_map, add_hive)(hive)
+
             line_number += 1
 
-    except Exception as e:
-        stdio.writeln("ERROR: Invalid configuration line")
+    except ConfigError:
+        raise
+    except Exception:
+        raise ConfigError("ERROR: Invalid configuration line")
+
+    return world_map
+
+def read_map(path=None):
+    """Reads the world from the configuration file at path (standard input by
+    default) in one go, printing an error message and returning None if it is invalid."""
+    try:
+        return parse_config(read_config_lines(path))
+    except ConfigError as e:
+        stdio.writeln(str(e))
 
 def test_compass(row, col, speed, map_size, moves):
     compass = Compass(row, col, speed)
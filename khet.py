@@ -8,10 +8,16 @@ for the Khet 3D game. It follows the same functional requirements
 as the original, but uses a different coding style.
 """
 
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import argparse
+import glob
+import os
 import re
-from typing import Dict, List, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 
 # ----------------------------------------------------------------------
 # Error message templates from Appendix A
@@ -29,11 +35,93 @@ ERROR_MESSAGES = {
     "invalid_pharaoh_count": "Invalid pharaohs: expected exactly 1 pharaoh per player"
 }
 
+# ----------------------------------------------------------------------
+# Piece kinds
+# ----------------------------------------------------------------------
+# Piece types stored in a packed cell
+NO_PIECE, SPHINX, PHARAOH, PYRAMID, SCARAB, LIFT, OTHER = range(7)
+
+# Directions, also used as piece orientations: 0-3 in the layer
+# (y grows downwards, like the rows of the configuration), 4-5 across layers
+NORTH, EAST, SOUTH, WEST, UP, DOWN = range(6)
+
+# Symbols with a meaning in the game -> (piece type, orientation).
+# Sphinxes face where they fire; pyramids (solid corner bottom-right,
+# bottom-left, top-left, top-right) and scarabs count clockwise quarter
+# turns; lifts point to the layer they send the laser to. "." marks an
+# empty neutral cell; any other symbol is an OTHER piece.
+SYMBOL_KINDS = {
+    ".": (NO_PIECE, NORTH),
+    "▲": (SPHINX, NORTH), "▶": (SPHINX, EAST), "▼": (SPHINX, SOUTH), "◀": (SPHINX, WEST),
+    "•": (PHARAOH, NORTH), "⊕": (PHARAOH, NORTH),
+    "◢": (PYRAMID, NORTH), "◣": (PYRAMID, EAST), "◤": (PYRAMID, SOUTH), "◥": (PYRAMID, WEST),
+    "╱": (SCARAB, NORTH), "╲": (SCARAB, EAST),
+    "⇑": (LIFT, UP), "⇓": (LIFT, DOWN),
+}
+
+OWNERS = ("N", "A", "B")
+OWNER_CODES = {owner: code for code, owner in enumerate(OWNERS)}
+
+# Symbol ids: a packed cell stores an index into SYMBOLS. Index 0 stands
+# for an empty cell, then come the SYMBOL_KINDS symbols, and every other
+# symbol shares OTHER_ID, its text being kept by the Board. The table
+# never grows, whatever the configurations hold.
+SYMBOLS: List[Optional[str]] = [None, *SYMBOL_KINDS, None]
+SYMBOL_IDS: Dict[str, int] = {symbol: symbol_id for symbol_id, symbol in enumerate(SYMBOLS) if symbol is not None}
+OTHER_ID = len(SYMBOLS) - 1
+SYMBOL_TYPES = bytearray([NO_PIECE, *(kind[0] for kind in SYMBOL_KINDS.values()), OTHER])
+SYMBOL_ORIENTATIONS = bytearray([NORTH, *(kind[1] for kind in SYMBOL_KINDS.values()), NORTH])
+
+
+def symbol_id(symbol: str) -> int:
+    """Index of symbol in SYMBOLS, OTHER_ID for a symbol without a meaning."""
+    return SYMBOL_IDS.get(symbol, OTHER_ID)
+
+# Packed cell values of every sphinx and pharaoh, whatever the owner
+SPHINX_CODES = frozenset(
+    SYMBOL_IDS[s] << 2 | o for s, (t, _) in SYMBOL_KINDS.items() if t == SPHINX for o in range(3)
+)
+PHARAOH_CODES = frozenset(
+    SYMBOL_IDS[s] << 2 | o for s, (t, _) in SYMBOL_KINDS.items() if t == PHARAOH for o in range(3)
+)
+SPECIAL_CODES = SPHINX_CODES | PHARAOH_CODES
+OTHER_CODES = frozenset(OTHER_ID << 2 | o for o in range(3))
+
+# Packed cell values of the "(symbol,owner)" tokens seen so far whose
+# symbol has a meaning; there are only a few dozen of them
+TOKEN_CODES: Dict[str, int] = {}
+
+
+def token_code(token: str) -> Optional[int]:
+    """Packed cell value of a "(symbol,owner)" token, None if it is malformed."""
+    code = TOKEN_CODES.get(token)
+    if code is None:
+        if not (token.startswith("(") and token.endswith(")")):
+            return None
+        parts = token[1:-1].split(",")
+        if len(parts) != 2:
+            return None
+        code = OWNER_CODES.get(parts[1].strip())
+        if code is None:
+            return None
+        code |= symbol_id(parts[0].strip()) << 2
+        if code >> 2 != OTHER_ID:
+            TOKEN_CODES[token] = code
+    return code
+
+
+def token_symbol(token: str) -> str:
+    """The symbol of a well-formed "(symbol,owner)" token."""
+    return token[1:-1].split(",")[0].strip()
+
+
 # ----------------------------------------------------------------------
 # Data structures
 # ----------------------------------------------------------------------
 class Piece:
     """Represents a game piece with symbol and owner."""
+    __slots__ = ("symbol", "owner")
+
     def __init__(self, symbol: str, owner: str):
         self.symbol = symbol
         self.owner = owner
@@ -41,21 +129,89 @@ class Piece:
     def __repr__(self) -> str:
         return f"({self.symbol},{self.owner})"
 
+    def code(self) -> int:
+        """Packed cell value of this piece (see Board)."""
+        return symbol_id(self.symbol) << 2 | OWNER_CODES[self.owner]
+
+    @staticmethod
+    def from_code(code: int, text: Optional[str] = None) -> Optional["Piece"]:
+        """The piece stored as a packed cell value, None for an empty cell.
+        text is the symbol of an OTHER_ID cell."""
+        if code == 0:
+            return None
+        return Piece(SYMBOLS[code >> 2] if text is None else text, OWNERS[code & 3])
+
+
+class Board:
+    """The whole Khet 3D board packed into one flat array of integer cells.
+
+    Cell (x, y, z) lives at index (z * height + y) * width + x and holds
+    symbol_id << 2 | owner_code, with 0 for an empty cell. The piece type
+    and orientation of a cell are SYMBOL_TYPES / SYMBOL_ORIENTATIONS of its
+    symbol_id, so reading them needs no object at all. The symbols of
+    OTHER_ID cells are kept in texts, by index."""
+    __slots__ = ("width", "height", "depth", "cells", "texts")
+
+    def __init__(self, width: int, height: int, depth: int):
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.cells = array("I", [0]) * (width * height * depth)
+        self.texts: Dict[int, str] = {}
+
+    def index(self, x: int, y: int, z: int) -> int:
+        return (z * self.height + y) * self.width + x
+
+    def code_at(self, x: int, y: int, z: int) -> int:
+        return self.cells[(z * self.height + y) * self.width + x]
+
+    def piece_type(self, index: int) -> int:
+        return SYMBOL_TYPES[self.cells[index] >> 2]
+
+    def orientation(self, index: int) -> int:
+        return SYMBOL_ORIENTATIONS[self.cells[index] >> 2]
+
+    def owner(self, index: int) -> str:
+        return OWNERS[self.cells[index] & 3]
+
+    def get(self, x: int, y: int, z: int) -> Optional[Piece]:
+        index = self.index(x, y, z)
+        return Piece.from_code(self.cells[index], self.texts.get(index))
+
+    def put(self, x: int, y: int, z: int, piece: Optional[Piece]) -> None:
+        index = self.index(x, y, z)
+        code = 0 if piece is None else piece.code()
+        self.cells[index] = code
+        if code >> 2 == OTHER_ID:
+            self.texts[index] = piece.symbol
+        else:
+            self.texts.pop(index, None)
+
 
 class Layer:
-    """One layer (z-level) of the Khet 3D board."""
-    def __init__(self, index: int, width: int, height: int):
+    """One layer (z-level) of the Khet 3D board, as a view onto a Board."""
+    __slots__ = ("index", "width", "height", "board")
+
+    def __init__(self, index: int, width: int, height: int, board: Optional[Board] = None):
         self.index = index
         self.width = width   # number of columns (x-axis)
         self.height = height # number of rows (y-axis)
-        self.cells: List[List[Optional[Piece]]] = [
-            [None] * width for _ in range(height)
-        ]
+        self.board = board if board is not None else Board(width, height, index + 1)
+
+    @property
+    def cells(self) -> Tuple[Tuple[Optional[Piece], ...], ...]:
+        """The layer's pieces row by row, built from the packed board on demand.
+
+        This is a read-only snapshot; change the board with put()."""
+        return tuple(
+            tuple(self.board.get(x, y, self.index) for x in range(self.width))
+            for y in range(self.height)
+        )
 
     def put(self, x: int, y: int, piece: Optional[Piece]) -> None:
         """Place a piece at coordinates (x, y) if within bounds."""
         if 0 <= x < self.width and 0 <= y < self.height:
-            self.cells[y][x] = piece
+            self.board.put(x, y, self.index, piece)
 
 
 # ----------------------------------------------------------------------
@@ -74,10 +230,12 @@ class Khet3D:
         self.height = 0
         self.layers_count = 0
 
+        self.board: Optional[Board] = None
         self.layers: List[Layer] = []
         self.sphinxes: Dict[str, int] = {"A": 0, "B": 0}
         self.pharaohs: Dict[str, int] = {"A": 0, "B": 0}
         self.error_flag = False
+        self.error_key: Optional[str] = None
 
     # --------------------------------------------------------------
     # Utility: write error and mark parsing failed
@@ -86,6 +244,7 @@ class Khet3D:
         message = ERROR_MESSAGES[key].format(*fmt_args)
         self.output_file.write_text(message + "\n")
         self.error_flag = True
+        self.error_key = key
         return False
 
     # --------------------------------------------------------------
@@ -106,6 +265,7 @@ class Khet3D:
             (self.output_dir / "noConfig.out").write_text(
                 ERROR_MESSAGES["no_config"].format(self.config_path) + "\n"
             )
+            self.error_key = "no_config"
             return False
 
         try:
@@ -139,6 +299,7 @@ class Khet3D:
             return self.fail("invalid_line_count", expected, len(lines))
 
         # Step 5: layer-by-layer parsing
+        self.board = Board(self.width, self.height, self.layers_count)
         idx = 2
         for z in range(self.layers_count):
             # layer header
@@ -146,44 +307,44 @@ class Khet3D:
                 return self.fail("invalid_layer_header", idx + 1, z)
             idx += 1
 
-            layer = Layer(z, self.width, self.height)
+            layer = Layer(z, self.width, self.height, self.board)
 
             # rows
             for row in range(self.height):
                 if idx >= len(lines):
                     return self.fail("invalid_line_count", expected, len(lines))
 
-                tokens = lines[idx].strip().split()
+                tokens = lines[idx].split()
                 if len(tokens) != self.width:
                     return self.fail("invalid_row_format", z, row)
 
-                for col, token in enumerate(tokens):
-                    if not (token.startswith("(") and token.endswith(")")):
-                        return self.fail("invalid_row_format", z, row)
-
-                    parts = token[1:-1].split(",")
-                    if len(parts) != 2:
-                        return self.fail("invalid_row_format", z, row)
-
-                    symbol, owner = (p.strip() for p in parts)
-                    if owner not in ("A", "B", "N"):
-                        return self.fail("invalid_row_format", z, row)
-
-                    piece = Piece(symbol, owner)
-                    layer.put(col, row, piece)
-
-                    # special piece checks
-                    if symbol in ["▲", "▼", "◀", "▶"]:  # sphinx
-                        if z != 0:
-                            return self.fail("invalid_sphinx_layer", z)
-                        if owner in ("A", "B"):
-                            self.sphinxes[owner] += 1
+                codes = [token_code(token) for token in tokens]
+                bad = codes.index(None) if None in codes else self.width
+
+                # special piece checks, in row order up to the first bad token
+                if not SPECIAL_CODES.isdisjoint(codes):
+                    for code in codes[:bad]:
+                        if code in SPHINX_CODES:
+                            if z != 0:
+                                return self.fail("invalid_sphinx_layer", z)
+                            if code & 3:
+                                self.sphinxes[OWNERS[code & 3]] += 1
+
+                        elif code in PHARAOH_CODES:
+                            if z != self.layers_count - 1:
+                                return self.fail("invalid_pharaoh_layer", z, self.layers_count - 1)
+                            if code & 3:
+                                self.pharaohs[OWNERS[code & 3]] += 1
+
+                if bad < self.width:
+                    return self.fail("invalid_row_format", z, row)
 
-                    elif symbol in ["•", "⊕"]:  # pharaoh
-                        if z != self.layers_count - 1:
-                            return self.fail("invalid_pharaoh_layer", z, self.layers_count - 1)
-                        if owner in ("A", "B"):
-                            self.pharaohs[owner] += 1
+                start = self.board.index(0, row, z)
+                self.board.cells[start:start + self.width] = array("I", codes)
+                if OTHER_CODES.intersection(codes):
+                    for col, code in enumerate(codes):
+                        if code >> 2 == OTHER_ID:
+                            self.board.texts[start + col] = token_symbol(tokens[col])
 
                 idx += 1
 
@@ -208,17 +369,74 @@ class Khet3D:
     # Write the initial parsed state to output file
     # --------------------------------------------------------------
     def write_state(self) -> None:
+        cells = self.board.cells
+        texts = {0: "( ,N)"}
+        for code in set(cells):
+            if code:
+                texts[code] = f"({SYMBOLS[code >> 2]},{OWNERS[code & 3]})"
+        words = [texts[code] for code in cells]
+        for index, symbol in self.board.texts.items():
+            words[index] = f"({symbol},{OWNERS[cells[index] & 3]})"
+
         lines_out = []
         for layer in self.layers:
             lines_out.append(f"Layer {layer.index}:")
-            for row in layer.cells:
-                lines_out.append(
-                    " ".join(str(piece) if piece else "( ,N)" for piece in row)
-                )
+            for row in range(self.height):
+                start = self.board.index(0, row, layer.index)
+                lines_out.append(" ".join(words[start:start + self.width]))
             lines_out.append("")  # blank line after each layer
         self.output_file.write_text("\n".join(lines_out).strip() + "\n")
 
 
+# ----------------------------------------------------------------------
+# Batch validation
+# ----------------------------------------------------------------------
+# Configurations handed to a worker process at a time
+BATCH_SIZE = 64
+
+
+def config_paths(pattern: str) -> List[str]:
+    """The .txt files of directory pattern, or the files matching glob pattern."""
+    if Path(pattern).is_dir():
+        return sorted(str(path) for path in Path(pattern).glob("*.txt"))
+    return sorted(glob.glob(pattern))
+
+
+def validate_configs(paths: List[str]) -> List[Optional[str]]:
+    """Parses each configuration, writing its output file as the CLI does,
+    and returns their ERROR_MESSAGES keys (None for a valid one)."""
+    keys = []
+    for path in paths:
+        game = Khet3D(path)
+        game.parse()
+        keys.append(game.error_key)
+    return keys
+
+
+def run_batch(paths: List[str], workers: int = 1, batch_size: int = BATCH_SIZE) -> Counter:
+    """Validates every configuration, spread over a pool of worker processes
+    if workers > 1, and counts their ERROR_MESSAGES keys (None for valid)."""
+    counts = Counter()
+    batches = [paths[start:start + batch_size] for start in range(0, len(paths), batch_size)]
+    if workers <= 1:
+        for batch in batches:
+            counts.update(validate_configs(batch))
+        return counts
+    with ProcessPoolExecutor(workers) as pool:
+        for keys in pool.map(validate_configs, batches):
+            counts.update(keys)
+    return counts
+
+
+def print_summary(counts: Counter, elapsed: float) -> None:
+    total = sum(counts.values())
+    rate = total / elapsed if elapsed else 0.0
+    print(f"{total} configurations in {elapsed:.2f}s ({rate:,.0f}/s)")
+    print(f"valid: {counts[None]}")
+    for key in ERROR_MESSAGES:
+        print(f"{key}: {counts[key]}")
+
+
 # ----------------------------------------------------------------------
 # CLI Entry Point
 # ----------------------------------------------------------------------
@@ -228,8 +446,18 @@ def main():
         epilog="Example: python3 khet.py configs/game1.txt"
     )
     parser.add_argument("config_path", type=str, help="Path to configuration file")
+    parser.add_argument("--batch", action="store_true",
+                        help="config_path is a directory or glob pattern: validate every configuration in it")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes in batch mode")
     args = parser.parse_args()
 
+    if args.batch:
+        start = time.perf_counter()
+        counts = run_batch(config_paths(args.config_path), args.workers)
+        print_summary(counts, time.perf_counter() - start)
+        return
+
     game = Khet3D(args.config_path)
     game.parse()  # Output/error file written regardless of success
 
@@ -0,0 +1,211 @@
+# khetai.py
+"""
+Computer player for Khet 3D.
+
+choose_move() runs an iterative-deepening negamax alpha-beta search on a
+Position within a time budget in milliseconds, playing moves in place
+with make/unmake. Moves are tried in the order: transposition table move,
+killer moves of the ply, then by history score. Leaves are scored on
+material and on what each sphinx's laser currently hits.
+
+Run with configuration files to benchmark a fixed-depth search on each:
+    python3 khetai.py configs/*.txt --depth 3
+"""
+import argparse
+import time
+from typing import Optional
+from khet import Khet3D, SYMBOL_TYPES, SYMBOL_ORIENTATIONS, OWNER_CODES, PYRAMID, PHARAOH
+from khethash import TranspositionTable, EXACT, LOWER, UPPER
+from khetlaser import fire
+from khetmoves import Position
+
+MATE = 100000
+PYRAMID_VALUE = 100
+# Score for a laser currently aimed at an enemy piece (or minus that, at one's own)
+PYRAMID_THREAT = 30
+PHARAOH_THREAT = 1000
+
+# Nodes searched between two looks at the clock
+CHECK_EVERY = 1024
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget runs out."""
+
+
+def evaluate(position: Position) -> int:
+    """Score of the position for the side to move."""
+    board = position.board
+    cells = board.cells
+    score = 0
+    for owner in (1, 2):
+        sign = 1 if owner == position.side else -1
+        for index in position.pieces[owner]:
+            if SYMBOL_TYPES[cells[index] >> 2] == PYRAMID:
+                score += sign * PYRAMID_VALUE
+
+        sphinx = position.sphinxes[owner]
+        if sphinx is None:
+            continue
+        hit = fire(board, sphinx, SYMBOL_ORIENTATIONS[cells[sphinx] >> 2])
+        if hit is not None:
+            code = cells[hit]
+            piece_type = SYMBOL_TYPES[code >> 2]
+            threat = PHARAOH_THREAT if piece_type == PHARAOH else PYRAMID_THREAT if piece_type == PYRAMID else 0
+            score += sign * threat if code & 3 != owner else -sign * threat
+    return score
+
+
+class Engine:
+    """Alpha-beta search over a Position, keeping its tables between moves."""
+
+    def __init__(self, table_size: int = 1 << 18):
+        self.table = TranspositionTable(table_size)
+        self.history = {}
+        self.killers = {}
+        self.nodes = 0
+        self.elapsed = 0.0
+        self.deadline = None
+
+    def choose_move(self, position: Position, budget_ms: Optional[float] = None, max_depth: int = 64):
+        """Searches position one more ply at a time until max_depth or until
+        budget_ms milliseconds have passed. Returns (move, score, depth) from
+        the last depth searched to the end, or None if there is no move."""
+        start = time.perf_counter()
+        self.deadline = None if budget_ms is None else start + budget_ms / 1000
+        self.nodes = 0
+        self.killers = {}
+        self.table.new_search()
+        best = None
+        for depth in range(1, max_depth + 1):
+            try:
+                score, move = self._root(position, depth)
+            except SearchTimeout:
+                break
+            if move is None:
+                break
+            best = (move, score, depth)
+            if abs(score) >= MATE - max_depth:
+                break
+        self.elapsed = time.perf_counter() - start
+        if best is None:
+            moves = position.generate_moves()
+            if moves:
+                best = (moves[0], 0, 0)
+        return best
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    def _root(self, position: Position, depth: int):
+        alpha, beta = -MATE - 1, MATE + 1
+        best_move = None
+        for move in self._ordered(position, position.generate_moves(), 0):
+            position.make_move(move)
+            try:
+                score = -self._search(position, depth - 1, -beta, -alpha, 1)
+            finally:
+                position.unmake_move()
+            if score > alpha:
+                alpha, best_move = score, move
+        if best_move is not None:
+            self.table.store(position.key, depth, alpha, EXACT, best_move)
+        return alpha, best_move
+
+    def _ordered(self, position: Position, moves, ply: int):
+        entry = self.table.lookup(position.key)
+        first = entry[4] if entry is not None else None
+        killers = self.killers.get(ply, ())
+        history = self.history
+
+        def priority(move):
+            if move == first:
+                return 3 << 40
+            if move in killers:
+                return 2 << 40
+            return history.get(move, 0)
+
+        moves.sort(key=priority, reverse=True)
+        return moves
+
+    def _search(self, position: Position, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % CHECK_EVERY == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+        if position.winner is not None:
+            return MATE - ply if OWNER_CODES[position.winner] == position.side else ply - MATE
+        if position.repetitions() > 1:
+            return 0
+
+        entry = self.table.lookup(position.key)
+        if entry is not None and entry[1] >= depth:
+            value, bound = entry[2], entry[3]
+            if bound == EXACT:
+                return value
+            if bound == LOWER and value >= beta:
+                return value
+            if bound == UPPER and value <= alpha:
+                return value
+        if depth == 0:
+            return evaluate(position)
+
+        moves = position.generate_moves()
+        if not moves:
+            return 0
+        original_alpha = alpha
+        best, best_move = -MATE - 1, None
+        for move in self._ordered(position, moves, ply):
+            position.make_move(move)
+            try:
+                score = -self._search(position, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                position.unmake_move()
+            if score > best:
+                best, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                killers = self.killers.setdefault(ply, [])
+                if move not in killers:
+                    killers.insert(0, move)
+                    del killers[2:]
+                self.history[move] = self.history.get(move, 0) + depth * depth
+                break
+
+        bound = UPPER if best <= original_alpha else LOWER if best >= beta else EXACT
+        self.table.store(position.key, depth, best, bound, best_move)
+        return best
+
+
+def benchmark(paths, depth: int) -> None:
+    """Prints a fixed-depth search of the starting position of each configuration."""
+    total_nodes = 0
+    total_time = 0.0
+    for path in paths:
+        game = Khet3D(path)
+        if not game.parse():
+            print(f"{path}: invalid configuration, see {game.output_file}")
+            continue
+        position = Position.from_game(game)
+        engine = Engine()
+        result = engine.choose_move(position, max_depth=depth)
+        move = position.move_text(result[0]) if result else "-"
+        print(f"{path}: depth {depth} move {move} score {result[1] if result else 0} "
+              f"nodes {engine.nodes} time {engine.elapsed:.3f}s nps {engine.nodes_per_second:,.0f}")
+        total_nodes += engine.nodes
+        total_time += engine.elapsed
+    if total_time:
+        print(f"total: nodes {total_nodes} time {total_time:.3f}s nps {total_nodes / total_time:,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Khet 3D - fixed-depth search benchmark")
+    parser.add_argument("configs", nargs="+", help="configuration files")
+    parser.add_argument("--depth", type=int, default=3, help="search depth in plies")
+    args = parser.parse_args()
+    benchmark(args.configs, args.depth)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# khethash.py
+"""
+Position identity for Khet 3D: Zobrist keys and a transposition table.
+
+Every (cell index, packed cell value) pair gets a random 64-bit key, and a
+position's key is the xor of the keys of its cells plus SIDE_KEY when B is
+to move. A packed value holds the symbol (so the piece type and
+orientation) and the owner. Empty cells have key 0, so a move only changes
+the key by the cells it writes, which Position updates as it goes.
+"""
+import random
+from typing import Dict, List, Optional
+from khet import SYMBOL_IDS
+
+# Largest board: 30 x 30 cells on 8 layers
+MAX_CELLS = 30 * 30 * 8
+
+SIDE_KEY = random.Random("side").getrandbits(64)
+
+# Packed values of empty cells
+EMPTY_CODES = (0, SYMBOL_IDS["."] << 2)
+
+# Per packed value, the key of that value on each cell index
+ZOBRIST: Dict[int, List[int]] = {}
+
+# Bound stored with a transposition table value
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+def zobrist_keys(code: int) -> List[int]:
+    """Keys of the packed value code on every cell index, 0s for empty cells."""
+    keys = ZOBRIST.get(code)
+    if keys is None:
+        if code in EMPTY_CODES:
+            keys = [0] * MAX_CELLS
+        else:
+            generator = random.Random(code)
+            keys = [generator.getrandbits(64) for _ in range(MAX_CELLS)]
+        ZOBRIST[code] = keys
+    return keys
+
+
+def position_key(cells, side: int) -> int:
+    """Key of the packed cells with side (owner code) to move, from scratch."""
+    key = SIDE_KEY if side == 2 else 0
+    for index, code in enumerate(cells):
+        key ^= zobrist_keys(code)[index]
+    return key
+
+
+class TranspositionTable:
+    """A fixed number of slots holding (key, depth, value, bound, move), each
+    position going to slot key % size.
+
+    A slot is overwritten by a search at least as deep, or by any search once
+    its entry was stored before the last new_search() call, so results of
+    earlier moves give way to the current one."""
+
+    def __init__(self, size: int = 1 << 20):
+        self.size = size
+        self.slots: List[Optional[tuple]] = [None] * size
+        self.generations = bytearray(size)
+        self.generation = 0
+        self.hits = 0
+        self.stores = 0
+
+    def new_search(self) -> None:
+        """Marks every stored entry as coming from an earlier search."""
+        self.generation = (self.generation + 1) & 0xFF
+
+    def lookup(self, key: int) -> Optional[tuple]:
+        """The (key, depth, value, bound, move) stored for key, if any."""
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, value: int, bound: int, move=None) -> None:
+        slot = key % self.size
+        entry = self.slots[slot]
+        if entry is None or entry[0] == key or depth >= entry[1] or self.generations[slot] != self.generation:
+            self.slots[slot] = (key, depth, value, bound, move)
+            self.generations[slot] = self.generation
+            self.stores += 1
+
+    def clear(self) -> None:
+        self.slots = [None] * self.size
+        self.generations = bytearray(self.size)
@@ -0,0 +1,135 @@
+# khetlaser.py
+"""
+Laser resolution on a packed Khet 3D board.
+
+A player's sphinx fires in the direction it faces. The beam runs along its
+layer until it meets a piece:
+  - a pyramid reflects it off its mirror side and is hit on a solid side,
+  - a scarab reflects it off either side,
+  - a lift (⇑ / ⇓) carries it to the cell above / below, where it keeps
+    going in the same direction,
+  - anything else (sphinx, pharaoh, other symbols) stops it and is hit.
+Empty cells and "." cells let it through.
+
+Each symbol id gets a table of four actions, one per incoming
+direction, built once from its piece type and orientation, so tracing is
+one list lookup per cell. A beam can only loop through reflections or
+lifts, so only those are remembered for cycle detection.
+"""
+from typing import Optional
+from khet import (
+    Board, SYMBOLS, SYMBOL_TYPES, SYMBOL_ORIENTATIONS, SPHINX_CODES, OWNER_CODES,
+    PYRAMID, SCARAB, LIFT, UP, NO_PIECE,
+)
+
+# Actions besides reflecting to one of the four directions 0-3
+HIT, LIFT_UP, LIFT_DOWN = 4, 5, 6
+
+# Outgoing direction of a beam travelling in direction d (N, E, S, W) off
+# orientation 0 of a piece: ◢ reflects off its "/" side facing north-west,
+# ╱ off both sides. Orientation o is orientation 0 turned o times clockwise.
+PYRAMID_REFLECTIONS = (HIT, 0, 3, HIT)
+SCARAB_REFLECTIONS = (1, 0, 3, 2)
+
+# (dx, dy) of each in-layer direction
+STEPS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+
+
+def _rotated(reflections, orientation):
+    """The reflection table of a piece turned orientation times clockwise."""
+    actions = []
+    for direction in range(4):
+        out = reflections[(direction - orientation) % 4]
+        actions.append(out if out == HIT else (out + orientation) % 4)
+    return tuple(actions)
+
+
+def _symbol_actions(symbol_id):
+    piece_type = SYMBOL_TYPES[symbol_id]
+    orientation = SYMBOL_ORIENTATIONS[symbol_id]
+    if piece_type == NO_PIECE:
+        return None
+    if piece_type == PYRAMID:
+        return _rotated(PYRAMID_REFLECTIONS, orientation)
+    if piece_type == SCARAB:
+        return _rotated(SCARAB_REFLECTIONS, orientation)
+    if piece_type == LIFT:
+        return (LIFT_UP if orientation == UP else LIFT_DOWN,) * 4
+    return (HIT,) * 4
+
+
+# Actions per packed cell value; None for cells the beam goes through
+ACTIONS = [_symbol_actions(code >> 2) for code in range(4 * len(SYMBOLS))]
+
+
+def fire(board: Board, start: int, direction: int) -> Optional[int]:
+    """Follows a beam leaving cell index start in direction (N, E, S or W).
+
+    Returns the index of the cell whose piece stops the beam, or None if the
+    beam leaves the board or runs in a loop."""
+    actions = ACTIONS
+    cells = board.cells
+    width, height, depth = board.width, board.height, board.depth
+    layer_size = width * height
+    index = start
+    x = start % width
+    y = start // width % height
+    z = start // layer_size
+    dx, dy = STEPS[direction]
+    step = dx + dy * width
+    seen = set()
+    while True:
+        x += dx
+        y += dy
+        if not (0 <= x < width and 0 <= y < height):
+            return None
+        index += step
+        action = actions[cells[index]]
+        while action is not None:
+            out = action[direction]
+            if out == HIT:
+                return index
+            if out < 4:
+                direction = out
+                dx, dy = STEPS[direction]
+                step = dx + dy * width
+                action = None
+            elif out == LIFT_UP:
+                z += 1
+                if z == depth:
+                    return None
+                index += layer_size
+                action = actions[cells[index]]
+            else:
+                z -= 1
+                if z < 0:
+                    return None
+                index -= layer_size
+                action = actions[cells[index]]
+            state = index << 2 | direction
+            if state in seen:
+                return None
+            seen.add(state)
+
+
+def sphinx_index(board: Board, owner: str) -> Optional[int]:
+    """Index of owner's sphinx (always on layer 0), None if it has none."""
+    owner_code = OWNER_CODES[owner]
+    cells = board.cells
+    layer_size = board.width * board.height
+    for code in SPHINX_CODES:
+        if code & 3 == owner_code:
+            try:
+                return cells.index(code, 0, layer_size)
+            except ValueError:
+                pass
+    return None
+
+
+def trace_laser(board: Board, owner: str) -> Optional[int]:
+    """Fires owner's sphinx and returns the index of the hit cell, if any."""
+    start = sphinx_index(board, owner)
+    if start is None:
+        return None
+    return fire(board, start, SYMBOL_ORIENTATIONS[board.cells[start] >> 2])
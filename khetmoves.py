@@ -0,0 +1,220 @@
+# khetmoves.py
+"""
+Move generation for Khet 3D on a packed board.
+
+A move is a (src, kind, dst) tuple of cell indices, kind being one of
+  "C" / "A"  rotate the piece at src a quarter turn clockwise / anticlockwise
+             (sphinxes, pyramids, scarabs; dst is src),
+  "M"        move the piece at src to the empty neighbour dst: one of the 8
+             cells around it in its layer or the cell above or below it
+             (pyramids, scarabs; pharaohs stay in their layer),
+  "F"        swap the scarab at src with the pyramid at dst, a neighbour.
+The text form is the one Khet3D.valid_move() accepts: "x,y,zC", "x,y,zA",
+"x,y,zMx,y,z" and "x,y,zMx,y,zF".
+
+Position.make_move() plays a move and then fires the mover's laser: a
+pyramid or pharaoh it hits is removed, and hitting a pharaoh ends the game.
+Every cell written on the way is pushed on an undo stack, so unmake_move()
+restores the board in place without ever copying it. The position's Zobrist
+key follows each write, and the keys of the positions on the way are
+counted so repetitions are found in O(1).
+"""
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from khet import (
+    Board, Khet3D, SYMBOL_IDS, SYMBOL_KINDS, SYMBOL_TYPES, SYMBOL_ORIENTATIONS, OWNERS, OWNER_CODES,
+    SPHINX, PHARAOH, PYRAMID, SCARAB,
+)
+from khethash import SIDE_KEY, position_key, zobrist_keys
+from khetlaser import fire, sphinx_index
+
+Move = Tuple[int, str, int]
+
+MOVE_PATTERN = re.compile(r"(\d{1,2}),(\d{1,2}),(\d{1,2})(C|A|M(\d{1,2}),(\d{1,2}),(\d{1,2})(F?))")
+
+# Packed value of an empty cell, as written back where a piece left
+EMPTY = SYMBOL_IDS["."] << 2
+
+# Pieces each move kind applies to
+ROTATING = (SPHINX, PYRAMID, SCARAB)
+MOVING = (PHARAOH, PYRAMID, SCARAB)
+DESTRUCTIBLE = (PHARAOH, PYRAMID)
+
+
+def _rotations(turn):
+    """Packed value after a quarter turn (turn=1 clockwise, -1 anticlockwise)
+    of every packed value whose symbol can rotate, indexed by value."""
+    by_kind = {kind: symbol for symbol, kind in SYMBOL_KINDS.items()}
+    table = {}
+    for symbol, (piece_type, orientation) in SYMBOL_KINDS.items():
+        if piece_type in ROTATING:
+            turns = 2 if piece_type == SCARAB else 4
+            rotated = by_kind[piece_type, (orientation + turn) % turns]
+            for owner in range(3):
+                table[SYMBOL_IDS[symbol] << 2 | owner] = SYMBOL_IDS[rotated] << 2 | owner
+    return table
+
+
+ROTATE_CLOCKWISE = _rotations(1)
+ROTATE_ANTICLOCKWISE = _rotations(-1)
+
+
+@lru_cache(maxsize=None)
+def neighbours(width: int, height: int, depth: int) -> Tuple[Tuple[Tuple[int, ...], Tuple[int, ...]], ...]:
+    """For every cell index, the indices of its (in-layer, above/below) neighbours."""
+    layer_size = width * height
+    table = []
+    for z in range(depth):
+        for y in range(height):
+            for x in range(width):
+                flat = tuple(
+                    (z * height + y + dy) * width + x + dx
+                    for dy in (-1, 0, 1) for dx in (-1, 0, 1)
+                    if (dx or dy) and 0 <= x + dx < width and 0 <= y + dy < height
+                )
+                index = (z * height + y) * width + x
+                vertical = tuple(index + dz * layer_size for dz in (-1, 1) if 0 <= z + dz < depth)
+                table.append((flat, vertical))
+    return tuple(table)
+
+
+class Position:
+    """A board and the side to move, played on in place with make/unmake."""
+
+    def __init__(self, board: Board, side: str = "A"):
+        self.board = board
+        self.side = OWNER_CODES[side]
+        self.winner: Optional[str] = None
+        self.undo: List[tuple] = []
+        self.neighbours = neighbours(board.width, board.height, board.depth)
+        self.sphinxes = [None] + [sphinx_index(board, owner) for owner in OWNERS[1:]]
+        # Indices of each player's pieces, by owner code
+        self.pieces = [set(), set(), set()]
+        for index, code in enumerate(board.cells):
+            if code & 3:
+                self.pieces[code & 3].add(index)
+        self.key = position_key(board.cells, self.side)
+        # How many times each key was reached since the starting position
+        self.key_counts = {self.key: 1}
+
+    @classmethod
+    def from_game(cls, game: Khet3D, side: str = "A") -> "Position":
+        """The starting position of a parsed configuration."""
+        return cls(game.board, side)
+
+    def generate_moves(self) -> List[Move]:
+        """Every legal move of the side to move."""
+        if self.winner is not None:
+            return []
+        cells = self.board.cells
+        neighbours = self.neighbours
+        moves = []
+        for src in sorted(self.pieces[self.side]):
+            piece_type = SYMBOL_TYPES[cells[src] >> 2]
+            if piece_type in ROTATING:
+                moves.append((src, "C", src))
+                moves.append((src, "A", src))
+            if piece_type in MOVING:
+                flat, vertical = neighbours[src]
+                targets = flat if piece_type == PHARAOH else flat + vertical
+                for dst in targets:
+                    code = cells[dst]
+                    if code == 0 or code == EMPTY:
+                        moves.append((src, "M", dst))
+                    elif piece_type == SCARAB and SYMBOL_TYPES[code >> 2] == PYRAMID:
+                        moves.append((src, "F", dst))
+        return moves
+
+    def _set(self, index: int, code: int) -> int:
+        """Writes code at index, keeping the piece sets in step; returns the old code."""
+        cells = self.board.cells
+        old = cells[index]
+        if old & 3:
+            self.pieces[old & 3].discard(index)
+        if code & 3:
+            self.pieces[code & 3].add(index)
+        cells[index] = code
+        self.key ^= zobrist_keys(old)[index] ^ zobrist_keys(code)[index]
+        return old
+
+    def _write(self, index: int, code: int, changes: list) -> None:
+        changes.append((index, self._set(index, code)))
+
+    def make_move(self, move: Move) -> Optional[int]:
+        """Plays move for the side to move, fires its laser and passes the turn.
+
+        Returns the index of the cell the laser hit, if any."""
+        cells = self.board.cells
+        src, kind, dst = move
+        code = cells[src]
+        changes = []
+        if kind == "C":
+            self._write(src, ROTATE_CLOCKWISE[code], changes)
+        elif kind == "A":
+            self._write(src, ROTATE_ANTICLOCKWISE[code], changes)
+        else:
+            self._write(src, cells[dst], changes)
+            self._write(dst, code, changes)
+
+        sphinx = self.sphinxes[self.side]
+        hit = None if sphinx is None else fire(self.board, sphinx, SYMBOL_ORIENTATIONS[cells[sphinx] >> 2])
+        self.undo.append((changes, self.winner))
+        if hit is not None:
+            hit_code = cells[hit]
+            if SYMBOL_TYPES[hit_code >> 2] in DESTRUCTIBLE:
+                self._write(hit, EMPTY, changes)
+                if SYMBOL_TYPES[hit_code >> 2] == PHARAOH and hit_code & 3:
+                    self.winner = OWNERS[3 - (hit_code & 3)]
+        self.side = 3 - self.side
+        self.key ^= SIDE_KEY
+        self.key_counts[self.key] = self.key_counts.get(self.key, 0) + 1
+        return hit
+
+    def unmake_move(self) -> None:
+        """Takes back the last move played with make_move()."""
+        changes, self.winner = self.undo.pop()
+        count = self.key_counts.pop(self.key)
+        if count > 1:
+            self.key_counts[self.key] = count - 1
+        for index, code in reversed(changes):
+            self._set(index, code)
+        self.side = 3 - self.side
+        self.key ^= SIDE_KEY
+
+    def repetitions(self) -> int:
+        """How many times the current position was reached in this game."""
+        return self.key_counts.get(self.key, 0)
+
+    def parse_move(self, text: str) -> Optional[Move]:
+        """The move written as text, None if it is not a legal move."""
+        match = MOVE_PATTERN.fullmatch(text)
+        if match is None:
+            return None
+        x, y, z = (int(group) for group in match.group(1, 2, 3))
+        board = self.board
+        if not (x < board.width and y < board.height and z < board.depth):
+            return None
+        src = board.index(x, y, z)
+        kind = match.group(4)
+        dst = src
+        if kind.startswith("M"):
+            x, y, z = (int(group) for group in match.group(5, 6, 7))
+            if not (x < board.width and y < board.height and z < board.depth):
+                return None
+            dst = board.index(x, y, z)
+            kind = "F" if match.group(8) else "M"
+        move = (src, kind, dst)
+        return move if move in self.generate_moves() else None
+
+    def move_text(self, move: Move) -> str:
+        """move in the text form parse_move() reads."""
+        src, kind, dst = move
+        text = self._coordinates(src)
+        if kind in ("C", "A"):
+            return text + kind
+        return text + "M" + self._coordinates(dst) + ("F" if kind == "F" else "")
+
+    def _coordinates(self, index: int) -> str:
+        width, height = self.board.width, self.board.height
+        return f"{index % width},{index // width % height},{index // (width * height)}"
@@ -1,61 +1,229 @@
 # main.py
+import argparse
+import json
+import random
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 import stdio
 from map import Map
 from bee import Bee
 from Flower import Flower
+from eventsim import run_events
+from simprofile import TickProfiler
+from snapshot import SnapshotWriter, dump_snapshot, read_snapshot
+from trajectories import TrajectoryBee
+from worldconfig import ConfigError, read_config_lines
 
-def read_map():
+
+def parse_config(lines, trajectories=False):
+    """Builds the world from an iterator over the lines of a configuration,
+    stopping at the first empty line. Returns (world_map, duration).
+
+    The flowers and bees are collected first and added to the map in one
+    batch, in file order. With trajectories, the bees are TrajectoryBees, each
+    seeded from the random module in file order."""
     # Read the first line for configuration parameters
-    config_line = stdio.readString()
+    config_line = next(lines, "")
     n, duration, pollen_type, pollen_action = config_line.split()
     n = int(n)
     duration = int(duration)
 
     # Create the map
     world_map = Map(n)
+    entities = []
 
     # Read the subsequent lines for flowers and hives
     line_number = 1
-    while True:
-        line = stdio.readString()
+    for line in lines:
         if line == "":
             break  # End of input
 
         parts = line.split()
         if not parts:
-            stdio.writeln(f"ERROR: Invalid object setup on line {line_number}")
-            return
+            raise ConfigError(f"ERROR: Invalid object setup on line {line_number}")
 
         obj_type = parts[0]
         if obj_type == 'F':
             # Flower configuration
             if len(parts) != 4:
-                stdio.writeln(f"ERROR: Invalid object setup on line {line_number}")
-                return
+                raise ConfigError(f"ERROR: Invalid object setup on line {line_number}")
             x, y, num_pollen = map(int, parts[1:])
             flower = Flower(x, y, pollen_type)
-            for _ in range(num_pollen):
-                flower.add_pollen(1)  # Add pollen granules
-            world_map.add_flower(flower)
+            # Same as calling add_pollen() once per granule
+            flower.pollen_count = max(num_pollen, 0)
+            entities.append(flower)
         elif obj_type == 'B':
-            # Bee configuration
-            if len(parts) != 4:
-                stdio.writeln(f"ERROR: Invalid object setup on line {line_number}")
-                return
+            # Bee configuration: B x y speed perception
+            if len(parts) != 5:
+                raise ConfigError(f"ERROR: Invalid object setup on line {line_number}")
             x, y, speed, perception = map(int, parts[1:])
-            bee = Bee(x, y, speed, perception)
-            world_map.add_bee(bee)
+            if trajectories:
+                entities.append(TrajectoryBee(x, y, speed, perception, random.getrandbits(64)))
+            else:
+                entities.append(Bee(x, y, speed, perception))
         else:
-            stdio.writeln(f"ERROR: Invalid object setup on line {line_number}")
-            return
+            raise ConfigError(f"ERROR: Invalid object setup on line {line_number}")
 
         line_number += 1
 
+    world_map.add_entities(entities)
+    return world_map, duration
+
+def read_map():
+    try:
+        world_map, _ = parse_config(iter(read_config_lines()))
+    except ConfigError as e:
+        stdio.writeln(str(e))
+        return
     return world_map
 
-if __name__ == "__main__":
+def load_config(path, trajectories=False):
+    """Reads the configuration file at path like read_map() reads standard input."""
+    return parse_config(iter(read_config_lines(path)), trajectories)
+
+def run_headless(config_path, seed, ticks=None, events=False, checkpoint=None, checkpoint_every=0,
+                 trajectories=False):
+    """Runs the simulation in config_path without rendering and returns its
+    summary metrics as a dict. The random generators are seeded with seed
+    before the world is built, so a (config, seed) pair always gives the same
+    run. ticks defaults to the duration given in the configuration. With events,
+    the next-event engine is used instead of calling Map.update() every tick.
+
+    With checkpoint, a snapshot is saved to that path (formatted with seed)
+    every checkpoint_every ticks; resume_headless() continues from it.
+
+    With trajectories, every bee replays its own seeded trajectory table
+    instead of drawing from the shared random module. events implies it, as
+    the next-event engine moves the bees in a different order than update()."""
+    random.seed(seed)
+    try:
+        import numpy
+        numpy.random.seed(seed)
+    except ImportError:
+        pass
+
+    result = {"config": config_path, "seed": seed}
+    try:
+        world_map, duration = load_config(config_path, trajectories or events)
+    except (ConfigError, ValueError, OSError) as e:
+        result["error"] = str(e)
+        return result
+
+    ticks = duration if ticks is None else ticks
+    initial_pollen = sum(entity.pollen_count for entity in world_map.entities if isinstance(entity, Flower))
+    result.update({"ticks": ticks, "initial_pollen": initial_pollen})
+    if checkpoint is not None:
+        checkpoint = checkpoint.format(seed=seed)
+    return _simulate(world_map, 0, result, events, checkpoint, checkpoint_every)
+
+def resume_headless(snapshot_path, checkpoint=None, checkpoint_every=0):
+    """Continues a run saved by run_headless() from its snapshot, with the same
+    outcome as if it had never stopped. Returns its summary metrics. As in
+    run_headless(), checkpoint is formatted with the run's seed."""
+    world_map, tick, result = read_snapshot(snapshot_path)
+    if checkpoint is not None:
+        checkpoint = checkpoint.format(seed=result["seed"])
+    return _simulate(world_map, tick, result, False, checkpoint, checkpoint_every)
+
+def _simulate(world_map, tick, result, events, checkpoint, checkpoint_every):
+    """Runs world_map from tick up to result["ticks"], saving snapshots if asked,
+    and adds the summary metrics to result."""
+    if events:
+        run_events(world_map, result["ticks"] - tick)
+    elif checkpoint is not None and checkpoint_every > 0:
+        with SnapshotWriter() as writer:
+            while tick < result["ticks"]:
+                world_map.update()
+                tick += 1
+                if tick % checkpoint_every == 0:
+                    writer.write(checkpoint, dump_snapshot(world_map, tick, result))
+    else:
+        for _ in range(result["ticks"] - tick):
+            world_map.update()
+
+    flowers = [entity for entity in world_map.entities if isinstance(entity, Flower)]
+    bees = [entity for entity in world_map.entities if isinstance(entity, Bee)]
+    positions = Counter((bee.row, bee.col) for bee in bees)
+    result = dict(result)
+    initial_pollen = result.pop("initial_pollen")
+    result.update({
+        "bees": len(bees),
+        "flowers": len(flowers),
+        "pollen_collected": initial_pollen - sum(flower.pollen_count for flower in flowers),
+        "bees_carrying_pollen": sum(1 for bee in bees if bee.carrying_pollen),
+        "bee_positions": [[row, col, count] for (row, col), count in sorted(positions.items())],
+    })
+    return result
+
+def _run_headless_job(job):
+    return run_headless(*job)
+
+def run_sweep(config_paths, seeds, ticks=None, workers=1, out=sys.stdout, events=False,
+              checkpoint=None, checkpoint_every=0, trajectories=False):
+    """Runs every (config, seed) combination headless and writes one JSON line
+    per run to out, in order, spreading the runs over a process pool."""
+    jobs = [(path, seed, ticks, events, checkpoint, checkpoint_every, trajectories)
+            for path in config_paths for seed in seeds]
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            chunksize = max(1, len(jobs) // (4 * workers))
+            for result in pool.map(_run_headless_job, jobs, chunksize=chunksize):
+                out.write(json.dumps(result) + "\n")
+    else:
+        for job in jobs:
+            out.write(json.dumps(_run_headless_job(job)) + "\n")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Bee simulation: without arguments, reads a world from standard input "
+                    "and prints the map for 10 iterations",
+        epilog="Example: python3 main.py --headless world.txt --runs 1000 --workers 8"
+    )
+    parser.add_argument("--headless", nargs="+", metavar="CONFIG",
+                        help="Run these configuration files without rendering, printing JSON lines")
+    parser.add_argument("--ticks", type=int, help="Ticks per headless run (default: the configured duration)")
+    parser.add_argument("--seed", type=int, default=0, help="First RNG seed of the headless runs (default: 0)")
+    parser.add_argument("--runs", type=int, default=1, help="Headless runs per configuration, one seed each (default: 1)")
+    parser.add_argument("--workers", type=int, default=1, help="Processes for the headless runs (default: 1)")
+    parser.add_argument("--events", action="store_true",
+                        help="Use the next-event engine for headless runs (implies --trajectories)")
+    parser.add_argument("--trajectories", action="store_true",
+                        help="Give each bee of the headless runs its own seeded trajectory table")
+    parser.add_argument("--checkpoint", metavar="PATH",
+                        help="Save a snapshot of each headless run to PATH ('{seed}' is replaced by the seed)")
+    parser.add_argument("--checkpoint-every", type=int, default=100, metavar="N",
+                        help="Ticks between snapshots (default: 100)")
+    parser.add_argument("--resume", metavar="SNAPSHOT", help="Continue a headless run from its snapshot")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print per-phase timings to standard error after the run")
+    parser.add_argument("--trace", metavar="PATH", help="Save per-tick timings as a Chrome trace to PATH")
+    args = parser.parse_args()
+    if args.events and (args.checkpoint or args.resume):
+        parser.error("--events cannot be combined with --checkpoint or --resume")
+
+    if args.resume:
+        result = resume_headless(args.resume, args.checkpoint, args.checkpoint_every)
+        sys.stdout.write(json.dumps(result) + "\n")
+        return
+    if args.headless:
+        seeds = range(args.seed, args.seed + args.runs)
+        run_sweep(args.headless, seeds, args.ticks, args.workers, events=args.events,
+                  checkpoint=args.checkpoint, checkpoint_every=args.checkpoint_every,
+                  trajectories=args.trajectories)
+        return
+
     world_map = read_map()
     if world_map:
+        if args.profile or args.trace:
+            world_map.profiler = TickProfiler()
         for _ in range(10):  # Run for 10 iterations
             world_map.update()
             world_map.print_map()
+        if args.profile:
+            print(world_map.profiler.summary(), file=sys.stderr)
+        if args.trace:
+            world_map.profiler.write_chrome_trace(args.trace)
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,191 @@
 # map.py
 from bee import Bee
-from flower import Flower
+from Flower import Flower
 import stdio
 
+# Side, in cells, of the square buckets used for neighbor queries
+BUCKET_SIZE = 8
+
 class Map:
     def __init__(self, size):
         self.size = size
         self.entities = []
+        self.bees = []
+        self.populations = []  # BeePopulations, moved one whole population at a time
+        # (row, col) -> flowers on that cell, in the order they were added.
+        # Flowers never move, so only add_flower() has to keep it up to date.
+        self.flowers_at = {}
+        # (row // BUCKET_SIZE, col // BUCKET_SIZE) -> flowers in that bucket that had
+        # pollen when last looked at; emptied flowers are dropped by the queries
+        self.pollen_buckets = {}
+        self.renderer = None  # MapRenderer, created on the first print_map()
+        self.profiler = None  # simprofile.TickProfiler, when instrumentation is on
 
     def add_flower(self, flower):
         self.entities.append(flower)
+        self._index_flower(flower)
+
+    def _index_flower(self, flower):
+        self.flowers_at.setdefault((flower.row, flower.col), []).append(flower)
+        self.refresh_flower(flower)
+
+    def refresh_flower(self, flower):
+        """Makes the neighbor queries see flower again after pollen was added to
+        it; flowers running out of pollen are noticed without being told."""
+        if flower.has_pollen():
+            bucket = self.pollen_buckets.setdefault(
+                (flower.row // BUCKET_SIZE, flower.col // BUCKET_SIZE), [])
+            if flower not in bucket:
+                bucket.append(flower)
 
     def add_bee(self, bee):
         self.entities.append(bee)
+        self.bees.append(bee)
 
-    def update(self):
-        for entity in self.entities:
+    def add_entities(self, entities):
+        """Adds flowers and bees in bulk, in the given order."""
+        self.entities.extend(entities)
+        for entity in entities:
             if isinstance(entity, Bee):
-                entity.move(self.size)
-                # Check for nearby flowers to collect pollen
-                for flower in self.entities:
-                    if isinstance(flower, Flower) and flower.row == entity.row and flower.col == entity.col:
-                        entity.collect_pollen(flower)
-
-    def print_map(self):
-        stdio.writeln("Current Map:")
-        for row in range(self.size):
-            for col in range(self.size):
-                found = False
-                for entity in self.entities:
-                    if entity.row == row and entity.col == col:
-                        if isinstance(entity, Bee):
-                            stdio.write("B ")
-                        elif isinstance(entity, Flower):
-                            stdio.write("F ")
-                        found = True
-                        break
-                if not found:
-                    stdio.write(". ")
-            stdio.writeln()
+                self.bees.append(entity)
+            elif isinstance(entity, Flower):
+                self._index_flower(entity)
+
+    def add_population(self, population):
+        """Adds a BeePopulation; its bees must all have been added to it already."""
+        self.entities.extend(population.bees)
+        self.populations.append(population)
+
+    def flowers_near(self, row, col, radius):
+        """Returns the flowers with pollen at most radius cells away from (row, col)
+        in any direction (a square, matching the 8-way moves), in bucket order.
+        Only the buckets overlapping both the square and the map are visited."""
+        found = []
+        buckets = self.pollen_buckets
+        last = self.size - 1
+        for bucket_row in range(max(row - radius, 0) // BUCKET_SIZE, min(row + radius, last) // BUCKET_SIZE + 1):
+            for bucket_col in range(max(col - radius, 0) // BUCKET_SIZE, min(col + radius, last) // BUCKET_SIZE + 1):
+                bucket = buckets.get((bucket_row, bucket_col))
+                if not bucket:
+                    continue
+                if not all(flower.has_pollen() for flower in bucket):
+                    bucket[:] = [flower for flower in bucket if flower.has_pollen()]
+                for flower in bucket:
+                    if abs(flower.row - row) <= radius and abs(flower.col - col) <= radius:
+                        found.append(flower)
+        return found
+
+    def nearest_flower(self, row, col, radius):
+        """Returns the closest flower with pollen within radius of (row, col), or
+        None. Distances are counted in 8-way moves; ties go to the smallest (row, col)."""
+        best = None
+        best_key = None
+        for flower in self.flowers_near(row, col, radius):
+            key = (max(abs(flower.row - row), abs(flower.col - col)), flower.row, flower.col)
+            if best_key is None or key < best_key:
+                best, best_key = flower, key
+        return best
+
+    def update(self):
+        if self.profiler is not None:
+            return self._update_profiled()
+        for bee in self.bees:
+            bee.move(self.size)
+            # Collect pollen from the flowers on the bee's cell
+            for flower in self.flowers_at.get((bee.row, bee.col), ()):
+                bee.collect_pollen(flower)
+        for population in self.populations:
+            # Moving never depends on pollen, so moving everyone first and then
+            # collecting in bee order gives the same result as bee by bee
+            population.move(self.size)
+            rows = population.row.tolist()
+            cols = population.col.tolist()
+            for index in range(population.count):
+                flowers = self.flowers_at.get((rows[index], cols[index]))
+                if flowers:
+                    bee = population.bees[index]
+                    for flower in flowers:
+                        bee.collect_pollen(flower)
+
+    def _update_profiled(self):
+        """update() split into timed phases. Moving never depends on pollen, so
+        moving every bee before collecting gives the same result."""
+        profiler = self.profiler
+        bees = list(self.bees)
+        for population in self.populations:
+            bees.extend(population.bees)
+        profiler.begin_tick(len(bees), len(self.entities) - len(bees))
+        with profiler.phase("move"):
+            for bee in self.bees:
+                bee.move(self.size)
+            for population in self.populations:
+                population.move(self.size)
+        with profiler.phase("collect"):
+            for bee in bees:
+                for flower in self.flowers_at.get((bee.row, bee.col), ()):
+                    bee.collect_pollen(flower)
+        profiler.end_tick()
+
+    def print_map(self, changed_only=False):
+        """Prints the map as one write. With changed_only, rows that are the same
+        as in the previous print are left out (the first print is always full)."""
+        if self.profiler is not None:
+            with self.profiler.phase("render"):
+                return self._print_map(changed_only)
+        return self._print_map(changed_only)
+
+    def _print_map(self, changed_only):
+        if self.renderer is None:
+            self.renderer = MapRenderer(self.size)
+        if changed_only:
+            stdio.write(self.renderer.render_changes(self.entities))
+        else:
+            stdio.write(self.renderer.render(self.entities))
+
+
+class MapRenderer:
+    """Draws entities into a character grid that is allocated once and reused
+    for every frame. Each frame costs one pass over the entities plus joining
+    the rows, and is returned as a single string."""
+
+    SYMBOLS = ((Bee, "B "), (Flower, "F "))
+
+    def __init__(self, size):
+        self.size = size
+        self.blank = [". "] * size
+        self.grid = [list(self.blank) for _ in range(size)]
+        self.previous = None  # rows of the last frame returned
+
+    def draw(self, entities):
+        """Returns the rows of the frame; as before, the first entity listed on a cell is shown."""
+        grid = self.grid
+        for row in grid:
+            row[:] = self.blank
+        taken = set()
+        for entity in entities:
+            cell = (entity.row, entity.col)
+            if cell in taken or not (0 <= entity.row < self.size and 0 <= entity.col < self.size):
+                continue
+            taken.add(cell)
+            for kind, symbol in self.SYMBOLS:
+                if isinstance(entity, kind):
+                    grid[entity.row][entity.col] = symbol
+                    break
+            else:
+                grid[entity.row][entity.col] = ""
+        return ["".join(row) for row in grid]
+
+    def render(self, entities):
+        """Returns the whole frame, in the format of the original Map.print_map()."""
+        self.previous = self.draw(entities)
+        return "Current Map:\n" + "".join(row + "\n" for row in self.previous)
+
+    def render_changes(self, entities):
+        """Returns only the rows that changed since the last frame, each prefixed
+        with its index, or the whole frame if there is no previous one."""
+        previous = self.previous
+        if previous is None:
+            return self.render(entities)
+        rows = self.previous = self.draw(entities)
+        changed = [f"{index}: {row}\n" for index, (row, old) in enumerate(zip(rows, previous)) if row != old]
+        return f"Current Map: {len(changed)} rows changed\n" + "".join(changed)
@@ -1,9 +1,72 @@
+import argparse
+from khet import Khet3D
+from khetai import Engine
+from khetmoves import Position
+
+
+# Times a position may come back before the game is drawn
+REPETITION_LIMIT = 3
+
+
+class GameState:
+    """A Khet 3D game between players 1 (A) and 2 (B) on a configuration file."""
+
+    def __init__(self, config_file):
+        self.game = Khet3D(config_file)
+        if not self.game.parse():
+            raise ValueError(f"Invalid configuration {config_file}")
+        self.position = Position.from_game(self.game)
+        self.current_player = 1
+
+    @property
+    def winner(self):
+        """1 or 2 once a pharaoh has been hit, else None."""
+        if self.position.winner is None:
+            return None
+        return 1 if self.position.winner == "A" else 2
+
+    def handle_move(self, move):
+        parsed = self.position.parse_move(move)
+        if parsed is None:
+            raise ValueError(f"Invalid move {move}")
+        self.position.make_move(parsed)
+
+    def write_output(self, message):
+        with open(self.game.output_file, "a", encoding="utf-8") as output:
+            output.write(message + "\n")
+
+    def check_win(self):
+        return self.position.winner is not None
+
+    def check_draw(self):
+        return self.position.repetitions() >= REPETITION_LIMIT or not self.position.generate_moves()
+
+
 def main():
-    game_state = GameState("path/to/config_file.txt")
+    parser = argparse.ArgumentParser(description="Khet 3D game")
+    parser.add_argument("config", help="configuration file")
+    parser.add_argument("--ai", choices=["1", "2", "both"], help="players moved by the engine")
+    parser.add_argument("--ms", type=float, default=1000, help="engine time per move in milliseconds")
+    parser.add_argument("--max-moves", type=int, help="declare a draw after this many moves")
+    args = parser.parse_args()
+
+    game_state = GameState(args.config)
+    engines = {}
+    if args.ai:
+        for player in (1, 2) if args.ai == "both" else (int(args.ai),):
+            engines[player] = Engine()
+    moves_played = 0
 
     while True:
         print(f"Player {game_state.current_player}'s turn:")
-        move = input("Enter your move: ")
+        engine = engines.get(game_state.current_player)
+        if engine is None:
+            move = input("Enter your move: ")
+        else:
+            choice, score, depth = engine.choose_move(game_state.position, args.ms)
+            move = game_state.position.move_text(choice)
+            print(f"Engine plays {move} (depth {depth}, score {score}, "
+                  f"{engine.nodes} nodes, {engine.nodes_per_second:,.0f} nodes/s)")
         
         if move == 'q':
             print("Game ended via quit.")
@@ -14,10 +77,11 @@ def main():
             game_state.write_output(f"Player {game_state.current_player} performed the move {move}")
             
             if game_state.check_win():
-                print(f"Player {game_state.current_player} wins!")
+                print(f"Player {game_state.winner} wins!")
                 break
             
-            if game_state.check_draw():
+            moves_played += 1
+            if game_state.check_draw() or moves_played == args.max_moves:
                 print("Game ended in a draw.")
                 break
             
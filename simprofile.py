@@ -0,0 +1,89 @@
+# simprofile.py
+"""
+Opt-in per-tick instrumentation for the bee simulation.
+
+Attach a TickProfiler to a Map (world_map.profiler = TickProfiler()) and
+every update() and print_map() records the wall time of its phases (bee
+movement, pollen collection, rendering), the number of bees and flowers,
+and the change in allocated memory blocks over the tick. Maps without a
+profiler only pay for one attribute check per call.
+
+The records can be printed as a summary table or saved as a Chrome trace
+(open it in chrome://tracing or https://ui.perfetto.dev).
+"""
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+
+class TickProfiler:
+    """Collects one record per tick: {"tick", "bees", "flowers", "blocks", "phases"},
+    where phases maps a phase name to its (start, duration) in seconds."""
+
+    def __init__(self):
+        self.records = []
+        self.origin = time.perf_counter()
+        self.current = None
+        self.blocks = 0
+
+    def begin_tick(self, bees, flowers):
+        """Starts the record of a new tick."""
+        self.current = {"tick": len(self.records), "bees": bees, "flowers": flowers,
+                        "blocks": 0, "phases": {}}
+        self.records.append(self.current)
+        self.blocks = sys.getallocatedblocks()
+
+    def end_tick(self):
+        self.current["blocks"] = sys.getallocatedblocks() - self.blocks
+
+    @contextmanager
+    def phase(self, name):
+        """Times the enclosed block as phase name of the current tick."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            if self.current is None:
+                self.begin_tick(0, 0)
+            phases = self.current["phases"]
+            previous_start, previous = phases.get(name, (start - self.origin, 0.0))
+            phases[name] = (previous_start, previous + end - start)
+
+    def summary(self):
+        """Returns a table with the total and mean time of each phase per tick."""
+        totals = {}
+        for record in self.records:
+            for name, (_, duration) in record["phases"].items():
+                totals[name] = totals.get(name, 0.0) + duration
+        ticks = max(len(self.records), 1)
+        lines = [f"{'phase':<12}{'total ms':>12}{'ms/tick':>12}"]
+        for name, total in totals.items():
+            lines.append(f"{name:<12}{total * 1000:>12.3f}{total * 1000 / ticks:>12.3f}")
+        if self.records:
+            last = self.records[-1]
+            blocks = sum(record["blocks"] for record in self.records) / ticks
+            lines.append(f"{len(self.records)} ticks, {last['bees']} bees, {last['flowers']} flowers, "
+                         f"{blocks:+.1f} allocated blocks/tick")
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """Returns the records in Chrome trace event format."""
+        events = []
+        for record in self.records:
+            for name, (start, duration) in record["phases"].items():
+                events.append({"name": name, "ph": "X", "pid": 1, "tid": 1,
+                               "ts": start * 1e6, "dur": duration * 1e6,
+                               "args": {"tick": record["tick"]}})
+            if record["phases"]:
+                start = min(start for start, _ in record["phases"].values())
+                events.append({"name": "entities", "ph": "C", "pid": 1, "ts": start * 1e6,
+                               "args": {"bees": record["bees"], "flowers": record["flowers"]}})
+                events.append({"name": "allocated blocks", "ph": "C", "pid": 1, "ts": start * 1e6,
+                               "args": {"delta": record["blocks"]}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path):
+        with open(path, "w") as trace:
+            json.dump(self.chrome_trace(), trace)
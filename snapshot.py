@@ -0,0 +1,156 @@
+# snapshot.py
+"""
+Checkpoints for long bee simulations.
+
+A snapshot is a small binary file: a fixed header, one kind byte per entity
+(in Map.entities order), the integer state of every entity packed into one
+array, and a pickled trailer with what is not an integer (pollen types,
+compass state and the state of the random module). Loading it gives a Map
+that continues exactly where the saved one was.
+
+Taking a snapshot copies the state into bytes on the caller's thread;
+SnapshotWriter then writes those bytes to disk on a background thread so
+the simulation loop does not wait for the file system.
+"""
+import os
+import pickle
+import queue
+import random
+import struct
+import threading
+from array import array
+from bee import Bee
+from Flower import Flower
+from map import Map
+from trajectories import TrajectoryBee
+
+MAGIC = b"BEESNAP1"
+# magic, tick, map size, number of entities, packed integers, trailer bytes
+HEADER = struct.Struct("<8sqqqqq")
+
+FLOWER, BEE, TRAJECTORY_BEE = b"F", b"B", b"T"
+
+
+def dump_snapshot(world_map, tick, meta=None):
+    """Returns the snapshot of world_map after tick ticks as bytes. meta is any
+    picklable value stored alongside (e.g. the run's parameters)."""
+    if world_map.populations:
+        raise ValueError("snapshots do not support BeePopulations")
+    kinds = bytearray()
+    numbers = array("q")
+    pollen_types = []
+    compasses = []
+    for entity in world_map.entities:
+        if isinstance(entity, Flower):
+            kinds += FLOWER
+            numbers.extend((entity.row, entity.col, entity.pollen_count))
+            pollen_types.append(entity.pollen_type)
+            continue
+        if isinstance(entity, TrajectoryBee):
+            kinds += TRAJECTORY_BEE
+            compasses.append((entity.trajectory.seed, entity.moves))
+        elif isinstance(entity, Bee):
+            kinds += BEE
+            compasses.append(entity.compass)
+        else:
+            raise ValueError(f"cannot snapshot {type(entity).__name__} entities")
+        numbers.extend((entity.row, entity.col, entity.speed, entity.perception,
+                        int(entity.carrying_pollen)))
+    trailer = pickle.dumps((pollen_types, compasses, random.getstate(), meta),
+                           protocol=pickle.HIGHEST_PROTOCOL)
+    header = HEADER.pack(MAGIC, tick, world_map.size, len(kinds), len(numbers), len(trailer))
+    return b"".join((header, bytes(kinds), numbers.tobytes(), trailer))
+
+
+def load_snapshot(data):
+    """Rebuilds the map from snapshot bytes and restores the random module's
+    state. Returns (world_map, tick, meta)."""
+    magic, tick, size, count, number_count, trailer_size = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a bee simulation snapshot")
+    offset = HEADER.size
+    kinds = data[offset:offset + count]
+    offset += count
+    numbers = array("q")
+    numbers.frombytes(data[offset:offset + 8 * number_count])
+    offset += 8 * number_count
+    pollen_types, compasses, random_state, meta = pickle.loads(data[offset:offset + trailer_size])
+
+    entities = []
+    pollen_types = iter(pollen_types)
+    compasses = iter(compasses)
+    values = iter(numbers)
+    for kind in kinds:
+        kind = bytes((kind,))
+        if kind == FLOWER:
+            row, col, pollen_count = next(values), next(values), next(values)
+            flower = Flower(row, col, next(pollen_types))
+            flower.pollen_count = pollen_count
+            entities.append(flower)
+            continue
+        row, col, speed, perception, carrying = (next(values) for _ in range(5))
+        if kind == TRAJECTORY_BEE:
+            seed, moves = next(compasses)
+            bee = TrajectoryBee(row, col, speed, perception, seed)
+            bee.moves = moves
+        else:
+            bee = Bee.__new__(Bee)
+            bee.row, bee.col, bee.speed, bee.perception = row, col, speed, perception
+            bee.compass = next(compasses)
+        bee.carrying_pollen = bool(carrying)
+        entities.append(bee)
+
+    world_map = Map(size)
+    world_map.add_entities(entities)
+    random.setstate(random_state)
+    return world_map, tick, meta
+
+
+def read_snapshot(path):
+    """Loads the snapshot file at path, see load_snapshot()."""
+    with open(path, "rb") as snapshot:
+        return load_snapshot(snapshot.read())
+
+
+class SnapshotWriter:
+    """Writes snapshots on a background thread. Each file is written under a
+    temporary name and then renamed, so a crash never leaves half a snapshot.
+    Use as a context manager, or call close() to wait for pending writes."""
+
+    def __init__(self):
+        self.pending = queue.Queue()
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self, path, data):
+        """Queues data to be written to path and returns immediately."""
+        if self.error is not None:
+            raise self.error
+        self.pending.put((path, data))
+
+    def _run(self):
+        while True:
+            job = self.pending.get()
+            if job is None:
+                return
+            path, data = job
+            try:
+                temporary = f"{path}.tmp"
+                with open(temporary, "wb") as snapshot:
+                    snapshot.write(data)
+                os.replace(temporary, path)
+            except OSError as e:
+                self.error = e
+
+    def close(self):
+        self.pending.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,111 @@
+# trajectories.py
+"""
+Compass trajectories computed once and shared between bees.
+
+A bee's path only depends on its speed and on the sequence its compass draws,
+so bees created with the same (speed, seed) can replay one table of
+(row step, col step) displacements instead of each asking its own Compass
+for a trajectory and decoding its direction on every move. main.py gives
+every bee its own seed, so there each table serves a single bee; sharing
+only happens for callers that reuse seeds.
+
+A table only keeps the moves from the one its slowest bee is about to make,
+so its size follows the spread between the bees sharing it rather than the
+length of the run, and it is dropped once no bee refers to it.
+"""
+import random
+import weakref
+from compass import Compass
+from bee import Bee, DIRECTION_STEPS
+
+# Moves added to a table at a time when a bee runs past its end; small, as
+# most tables belong to a single bee
+TABLE_BLOCK = 64
+
+# (speed, seed) -> Trajectory, for as long as some bee holds on to it
+TABLES = weakref.WeakValueDictionary()
+
+
+class Trajectory:
+    """The displacements drawn by a Compass of the given speed when the random
+    module starts from seed, extended on demand. The compass draws from the
+    table's own random.Random, swapped into the random module only while
+    extending, so the global generator is left untouched.
+
+    row_steps[i] and col_steps[i] hold move base + i; moves before base were
+    made by every bee in bees and have been dropped."""
+
+    def __init__(self, speed, seed):
+        self.speed = speed
+        self.seed = seed
+        self.base = 0
+        self.row_steps = []
+        self.col_steps = []
+        self.bees = weakref.WeakSet()
+        self.compass = None
+        self.generator = random.Random(seed)
+
+    def extend(self, length):
+        """Drops the moves every bee has made, then draws moves until the
+        table reaches move length."""
+        oldest = min((bee.moves for bee in self.bees), default=self.base)
+        drop = min(oldest - self.base, len(self.row_steps))
+        if drop > 0:
+            del self.row_steps[:drop]
+            del self.col_steps[:drop]
+            self.base += drop
+
+        saved = random.getstate()
+        random.setstate(self.generator.getstate())
+        try:
+            if self.compass is None:
+                self.compass = Compass(0, 0, self.speed)
+            while self.base + len(self.row_steps) < length:
+                trajectory = self.compass.get_next_trajectory()
+                if self.base < oldest and not self.row_steps:
+                    # No bee will read this move (e.g. all were restored past it)
+                    self.base += 1
+                    continue
+                distance = trajectory.get_distance()
+                row_step, col_step = DIRECTION_STEPS.get(trajectory.get_direction_in_degrees(), (0, 0))
+                self.row_steps.append(row_step * distance)
+                self.col_steps.append(col_step * distance)
+            self.generator.setstate(random.getstate())
+        finally:
+            random.setstate(saved)
+
+
+def trajectory_table(speed, seed):
+    """Returns the shared Trajectory for (speed, seed) that still holds the
+    first move, so a new bee can start from it."""
+    table = TABLES.get((speed, seed))
+    if table is None or table.base > 0:
+        table = TABLES[speed, seed] = Trajectory(speed, seed)
+    return table
+
+
+class TrajectoryBee(Bee):
+    """A Bee replaying the shared trajectory table for its (speed, seed), so a
+    move is two list lookups and a clamp."""
+
+    def __init__(self, row, col, speed, perception, seed):
+        self.row = row
+        self.col = col
+        self.speed = speed
+        self.perception = perception
+        self.carrying_pollen = False
+        self.moves = 0
+        self.trajectory = trajectory_table(speed, seed)
+        self.trajectory.bees.add(self)
+
+    def move(self, map_size):
+        trajectory = self.trajectory
+        index = self.moves - trajectory.base
+        if index >= len(trajectory.row_steps):
+            trajectory.extend(self.moves + TABLE_BLOCK)
+            index = self.moves - trajectory.base
+        self.moves += 1
+
+        # Bound the movement by the size of the map
+        self.row = max(0, min(self.row + trajectory.row_steps[index], map_size - 1))
+        self.col = max(0, min(self.col + trajectory.col_steps[index], map_size - 1))
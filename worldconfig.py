@@ -0,0 +1,27 @@
+# worldconfig.py
+"""
+Bulk reading of bee-world configuration files, shared by main.py and h1.py.
+
+The whole configuration is read at once (memory-mapped for files, one
+buffered read for standard input) and split into lines in a single pass,
+instead of one stdio.readString() call per line.
+"""
+import mmap
+import os
+import sys
+
+
+class ConfigError(Exception):
+    """Raised for an invalid world configuration; the message is the line to print."""
+
+
+def read_config_lines(path=None):
+    """Returns the lines of the configuration file at path, or of standard
+    input when path is None, without their line endings."""
+    if path is None:
+        return sys.stdin.buffer.read().decode("utf-8").splitlines()
+    with open(path, "rb") as config:
+        if os.fstat(config.fileno()).st_size == 0:
+            return []  # mmap refuses empty files
+        with mmap.mmap(config.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return str(data, "utf-8").splitlines()